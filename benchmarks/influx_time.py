@@ -0,0 +1,45 @@
+"""Benchmark of Influx timestamp conversion, run with ``python -m benchmarks.influx_time``"""
+import re
+import timeit
+from datetime import datetime, timedelta
+
+from delatore.sources.influx import TIME_PATTERN, _convert_time
+
+_RE_TIME_GROUPS = re.compile(r'(.+)\.(\d+)(Z)')
+_RE_TIME_GROUPS_WITHOUT_MS = re.compile(r'(.+)(Z)')
+
+
+def legacy_convert_time(timestamp) -> datetime:
+    """Regex + strptime implementation used before"""
+    match_ts = _RE_TIME_GROUPS.match(timestamp)
+    if match_ts is None:
+        match_ts = _RE_TIME_GROUPS_WITHOUT_MS.match(timestamp)
+        timestamp, timezone = match_ts.groups()
+        return datetime.strptime(f'{timestamp}.123456{timezone}', TIME_PATTERN)
+    timestamp, nsec, timezone, *_ = match_ts.groups()
+    return datetime.strptime(f'{timestamp}.{nsec[:6]}{timezone}', TIME_PATTERN)
+
+
+def _timestamps(count: int):
+    start = datetime(2020, 10, 21, 12, 14, 11)
+    return [f'{(start + timedelta(seconds=i)).isoformat()}.{i:09}Z' for i in range(count)]
+
+
+def main(count=10000, repeat=5):
+    """Print time spent on conversion of ``count`` timestamps"""
+    unique = _timestamps(count)
+    repeated = unique[:10] * (count // 10)
+    for stamps in (unique, repeated):
+        assert all(legacy_convert_time(ts) == _convert_time(ts) for ts in stamps)
+    cases = {
+        'legacy (regex + strptime)': lambda: [legacy_convert_time(ts) for ts in unique],
+        'slice parser, uncached': lambda: [_convert_time.__wrapped__(ts) for ts in unique],
+        'slice parser, repeated stamps': lambda: [_convert_time(ts) for ts in repeated],
+    }
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=repeat))
+        print(f'{name:<32} {best / count * 1e6:8.3f} us/timestamp')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Benchmark of pub/sub message serialisation, run with ``python -m benchmarks.serialization``"""
+import json
+import timeit
+
+from delatore.serialization import CODECS, decode, encode, set_codec
+from delatore.unified_json import Status, generate_error_status, generate_message, generate_status
+
+SUBSCRIBERS = 2
+HOSTS = 50
+
+
+def _message():
+    statuses = [generate_status(f'host-{index}.example.com', Status.OK, '09.08.2005 18:31',
+                                f'https://grafana.example.com/d/{index}') for index in range(HOSTS)]
+    statuses.append(generate_error_status('host-x.example.com', 'no reads', Status.ALERTING))
+    return statuses
+
+
+def legacy(statuses):
+    """Serialisation path used before"""
+    payload = json.dumps(generate_message('influxdb', statuses).to_dict())
+    for _ in range(SUBSCRIBERS):
+        json.loads(payload)
+
+
+def current(statuses):
+    """Message is serialised once by source, payload is decoded once for all subscribers"""
+    payload = encode(generate_message('influxdb', statuses))
+    for _ in range(SUBSCRIBERS):
+        decode(payload)
+
+
+def main(repeat=5, number=1000):
+    """Print time spent on single message passed from source to all subscribers"""
+    statuses = _message()
+    cases = {'legacy json': legacy}
+    for name in sorted(CODECS):
+        cases[name] = current
+    for name, case in cases.items():
+        if name in CODECS:
+            set_codec(name)
+        best = min(timeit.repeat(lambda: case(statuses), number=number, repeat=repeat))
+        print(f'{name:<12} {best / number * 1e6:10.1f} us/message')
+
+
+if __name__ == '__main__':
+    main()
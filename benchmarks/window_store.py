@@ -0,0 +1,59 @@
+"""Benchmark of threshold evaluation over host windows, run with ``python -m benchmarks.window_store``"""
+import random
+import timeit
+from collections import deque
+
+from delatore.sources.windows import ArrayWindowStore, WindowedStore
+
+WINDOW = 300
+POINTS = 30
+THRESHOLD = 80
+TIMEOUT = 90
+
+
+def _points(hosts: int, now: float):
+    rnd = random.Random(hosts)
+    for host in range(hosts):
+        last = now - rnd.uniform(0, 2 * TIMEOUT)
+        for index in range(POINTS):
+            yield f'host-{host}', last - (POINTS - index) * 10, rnd.uniform(40, 120)
+
+
+def legacy_check(host_timings: dict, last_times: dict, now: float):
+    """Per host loop with ``deque`` and ``min()`` used before"""
+    stale, tripped = [], []
+    for host, timings in host_timings.items():
+        if now - last_times[host] > TIMEOUT:
+            stale.append(host)
+        elif min(timings) > THRESHOLD:
+            tripped.append(host)
+    return stale, tripped
+
+
+def main(repeat=5, number=100):
+    """Print time spent on single evaluation of all hosts"""
+    now = 1_600_000_000.0
+    for hosts in (10, 100, 1000):
+        points = list(_points(hosts, now))
+        host_timings, last_times = {}, {}
+        stores = [WindowedStore(WINDOW, POINTS), ArrayWindowStore(WINDOW, POINTS)]
+        for host, seconds, value in points:
+            host_timings.setdefault(host, deque([], POINTS)).append(value)
+            last_times[host] = seconds
+            for store in stores:
+                store.add(host, seconds, value, seconds)
+        expected = legacy_check(host_timings, last_times, now)
+        for store in stores:
+            assert tuple(store.check(now, TIMEOUT, all_above=THRESHOLD)) == expected
+        cases = {
+            'legacy loops': lambda: legacy_check(host_timings, last_times, now),
+            'windowed store': lambda: stores[0].check(now, TIMEOUT, all_above=THRESHOLD),
+            'array store': lambda: stores[1].check(now, TIMEOUT, all_above=THRESHOLD),
+        }
+        for name, case in cases.items():
+            best = min(timeit.repeat(case, number=number, repeat=repeat))
+            print(f'{hosts:>5} hosts, {name:<16} {best / number * 1e6:10.1f} us/check')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,19 @@
 """Run bot as python module"""
 import asyncio
 import os
-import threading
 from argparse import ArgumentParser
 
-from apubsub import Service
+from delatore.bus import APUBSUB, BUSES, create_bus
+from delatore.serialization import CODECS, JSON, set_codec
+from delatore.signals import StopSignal
+from delatore.sources.scheduling import COALESCED, SCHEDULERS
 
+STATE_DIR = os.path.join(os.path.expanduser('~'), '.local', 'state', 'delatore')
+OUTBOX_FILE = 'outbox.db'
 
 # pylint:disable=import-outside-toplevel
 
-def _config():
-    from delatore import configuration as cfg
+def _args():
     arg_p = ArgumentParser(description='Bot for reporting CSM monitoring status to telegram channel and alerta')
     arg_p.add_argument('--config', default=None, help='Configuration file to use')
     arg_p.add_argument('--chat', default=os.getenv('chat_id'), help='Chat for notifications')
@@ -19,8 +22,25 @@ def _config():
     arg_p.add_argument('--awx_auth_token', default=os.getenv('AWX_AUTH_TOKEN'), help='OAuth2 Token for Ansible Tower')
     arg_p.add_argument('--alerta_api_key', default=os.getenv('alerta_api_key'), help='Token for Alerta')
     arg_p.add_argument('--alerta_service', default=os.getenv('alerta_service'), help='Alerta reporting service')
+    arg_p.add_argument('--schedule', default=COALESCED, choices=sorted(SCHEDULERS),
+                       help='Polling schedule of Influx sources: poll all at once in single batch (coalesced) '
+                            'or spread polling across polling interval (spread)')
+    arg_p.add_argument('--codec', default=JSON, choices=sorted(CODECS),
+                       help='Serialisation format of messages passed from sources to outputs')
+    arg_p.add_argument('--state_dir', default=os.getenv('DELATORE_STATE_DIR', STATE_DIR),
+                       help='Directory of files kept between restarts: outbox database and status boards')
+    arg_p.add_argument('--outbox', default=None,
+                       help='SQLite file keeping received messages until outputs deliver them, '
+                            f'{OUTBOX_FILE} in state directory by default, use :memory: to keep them in memory only')
+    arg_p.add_argument('--bus', default=APUBSUB, choices=BUSES,
+                       help='Message bus between sources and outputs: apubsub service (apubsub) '
+                            'or in-process queues passing messages without serialisation (local)')
+    return arg_p.parse_args()
+
+
+def _config(args):
+    from delatore import configuration as cfg
 
-    args = arg_p.parse_args()
     config_file = args.config
 
     token, chat_id = args.token, args.chat
@@ -37,17 +57,21 @@ def _config():
     raise RuntimeError('Please provide chat ID and bot token or configuration file to use')
 
 
-async def _ordered_start(service):
+async def _ordered_start(service, args):
     from delatore.outputs import start_outputs
     from delatore.sources import start_sources
 
-    config = _config()
+    config = _config(args)
+    set_codec(args.codec)
+
+    os.makedirs(args.state_dir, exist_ok=True)
+    outbox = args.outbox or os.path.join(args.state_dir, OUTBOX_FILE)
 
-    stop_event = threading.Event()
+    stop_event = StopSignal()
     loop = asyncio.get_running_loop()
-    out_tsk = loop.create_task(start_outputs(service, stop_event, config))
+    out_tsk = loop.create_task(start_outputs(service, stop_event, config, outbox, args.state_dir))
     await asyncio.sleep(.5)
-    src_tsk = loop.create_task(start_sources(service, stop_event, config))
+    src_tsk = loop.create_task(start_sources(service, stop_event, config, args.schedule))
     await asyncio.wait([
         src_tsk,
         out_tsk,
@@ -55,11 +79,12 @@ async def _ordered_start(service):
 
 
 def _main():
-    service = Service()
+    args = _args()
+    service = create_bus(args.bus)
     service.start()
 
     try:
-        asyncio.run(_ordered_start(service))
+        asyncio.run(_ordered_start(service, args))
     finally:
         service.stop()
 
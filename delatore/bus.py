@@ -0,0 +1,132 @@
+"""In-process message bus with the same interface as ``apubsub`` service"""
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+APUBSUB = 'apubsub'
+LOCAL = 'local'
+BUSES = (APUBSUB, LOCAL)
+
+
+class LocalClient:
+    """Client of ``LocalBus``, published data is delivered as is"""
+
+    by_reference = True
+
+    def __init__(self, bus: 'LocalBus'):
+        self.bus = bus
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._receiving = False
+
+    @property
+    def _data_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            raise ValueError('Consumer queue for client is missing.\nCall client.start_consuming() first')
+        return self._queue
+
+    async def start_consuming(self):
+        """Create input queue in the current event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+
+    def _deliver(self, data: Any):
+        if self._queue is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._queue.put_nowait(data)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, data)
+
+    async def publish(self, topic: str, data: Any):
+        """Publish data to all subscribers of the topic"""
+        self.bus.publish(topic, data)
+
+    async def subscribe(self, topic: str):
+        """Subscribe client to a topic"""
+        self.bus.subscribe(topic, self)
+
+    async def unsubscribe(self, topic: str):
+        """Unsubscribe client from topic
+
+        Previously published messages will still be available
+        """
+        self.bus.unsubscribe(topic, self)
+
+    async def get(self, timeout=0.0):
+        """Get single data message from input queue
+
+        Returning received message or None, if queue is empty.
+        If ``timeout > 0``, will wait for given seconds if input queue is empty.
+        If ``timeout is None``, will wait forever
+        """
+        try:
+            return await asyncio.wait_for(self._data_queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def get_all(self) -> List[Any]:
+        """Get all already received messages"""
+        result = []
+        while not self._data_queue.empty():
+            result.append(self._data_queue.get_nowait())
+        return result
+
+    async def get_iter(self):
+        """Start async generator receiving published messages"""
+        self._receiving = True
+        while self._receiving:
+            data = await self.get(.1)
+            if data is not None:
+                yield data
+
+    def stop_getting(self):
+        """Stop async generator"""
+        self._receiving = False
+
+
+class LocalBus:
+    """Topics and their subscribers in current process"""
+
+    def __init__(self):
+        self._topics: Dict[str, Set[LocalClient]] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Nothing to start, present for compatibility with ``apubsub.Service``"""
+
+    def stop(self):
+        """Drop all subscriptions"""
+        with self._lock:
+            self._topics.clear()
+
+    def get_client(self) -> LocalClient:
+        return LocalClient(self)
+
+    def subscribe(self, topic: str, client: LocalClient):
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(client)
+
+    def unsubscribe(self, topic: str, client: LocalClient):
+        with self._lock:
+            self._topics.get(topic, set()).discard(client)
+
+    def publish(self, topic: str, data: Any):
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+        for client in subscribers:
+            client._deliver(data)  # pylint:disable=protected-access
+
+
+def create_bus(name: str = APUBSUB):
+    """Create message bus by its name"""
+    if name == LOCAL:
+        return LocalBus()
+    if name == APUBSUB:
+        from apubsub import Service  # pylint:disable=import-outside-toplevel
+        return Service()
+    raise ValueError(f'Unknown message bus {name}, use one of: {", ".join(BUSES)}')
@@ -1,6 +1,6 @@
 """Configurations fixed for library"""
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import tyaml
 from ocomone import Resources
@@ -21,9 +21,19 @@ class OutputConfiguration(Configuration):
 
 @dataclass(frozen=True)
 class Timings:
-    """Timings configuration"""
+    """Timings configuration
+
+    Polling interval is multiplied by ``backoff_factor`` up to ``max_polling_interval``
+    while source status stays the same. Random delay up to ``jitter`` seconds
+    is added to each polling interval of independently polled sources.
+    Failed polling is retried with delay growing by ``backoff_factor`` up to ``max_retry_interval``
+    """
     polling_interval: float
     request_timeout: float
+    max_polling_interval: Optional[float] = None
+    backoff_factor: float = 2.0
+    max_retry_interval: Optional[float] = None
+    jitter: float = 0.0
 
 
 @dataclass(frozen=True)
@@ -1,16 +1,22 @@
 """All delatore outputs"""
 import asyncio
-from threading import Event
 
 from apubsub import Service
 
 from .alerta import AlertaRunner
+from .durable import IN_MEMORY
 from .telegram import BotRunner
 from ..configuration import InstanceConfig
+from ..signals import StopEvent
 
 
-async def start_outputs(service: Service, stop_event: Event, config: InstanceConfig):
+async def start_outputs(service: Service, stop_event: StopEvent, config: InstanceConfig,
+                        outbox_path: str = IN_MEMORY, state_dir: str = '.'):
+    """Start all outputs, received messages are stored in ``outbox_path`` SQLite database until delivered
+
+    Other files kept between restarts are stored in ``state_dir``
+    """
     await asyncio.wait([
-        AlertaRunner(service, stop_event, config).start(),
-        BotRunner(service, stop_event, config).start(),
+        AlertaRunner(service, stop_event, config, outbox_path=outbox_path).start(),
+        BotRunner(service, stop_event, config, outbox_path=outbox_path, state_dir=state_dir).start(),
     ])
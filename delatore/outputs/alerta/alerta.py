@@ -1,20 +1,24 @@
 import asyncio
-import json
 import logging
-import threading
 from datetime import datetime
 
-from alertaclient.api import Client
 from apubsub import Service
 
+from .api import AlertaApi, AlertaError, MAX_CONCURRENCY
+from .index import AlertIndex
+from ..consumer import next_batch, watch_stop
+from ..durable import DurableOutbox, IN_MEMORY, Undeliverable
 from ...configuration import OUTPUTS_CFG, SOURCES_CFG
 from ...configuration.dynamic import DEFAULT_INSTANCE_CONFIG, InstanceConfig
+from ...signals import StopEvent
+from ...unified_json import StatusMessage
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
 
 ALERTA_CONFIG = OUTPUTS_CFG['alerta']
 STATUS = 'status'
+RETRIED_CLIENT_ERRORS = (408, 429)  # timeout and rate limit
 
 
 def get_name_timeout(conf):
@@ -35,56 +39,63 @@ def create_msg(record):
 
 class AlertaRunner:
     """Alerta runner wrapper"""
-    _alerta: Client = None
-    _alerta_thread: threading.Thread
+    _alerta: AlertaApi = None
     last_heartbeat = 0.0
     HEARTBEAT_INTERVAL = 300
 
-    def __init__(self, msg_service: Service, stop_event: threading.Event,
-                 config: InstanceConfig = DEFAULT_INSTANCE_CONFIG, send_heartbeats: bool = True):
+    def __init__(self, msg_service: Service, stop_event: StopEvent,
+                 config: InstanceConfig = DEFAULT_INSTANCE_CONFIG, send_heartbeats: bool = True,
+                 outbox_path: str = IN_MEMORY):
         self.client = msg_service.get_client()
+        self.durable = DurableOutbox(ALERTA_CONFIG.name, outbox_path)
         self.stop_event = stop_event
         self.config = config
         self.alerta_api_key = config.alerta_api_key
         self._send_heartbeats = send_heartbeats
+        self.index = AlertIndex()
 
     @property
-    def alerta(self):
+    def alerta(self) -> AlertaApi:
         """Return alerta instance, create new if missing"""
         if self._alerta is None:
             LOGGER.warning('No alerta exist. Create client.')
-            self._alerta = Client(key=self.alerta_api_key, endpoint=ALERTA_CONFIG.params['endpoint'])
+            self._alerta = AlertaApi(ALERTA_CONFIG.params['endpoint'], self.alerta_api_key,
+                                     max_concurrency=ALERTA_CONFIG.params.get('concurrency', MAX_CONCURRENCY))
         return self._alerta
 
-    def alert(self, message):
-        """Send messages to alerta"""
-        alerta_ids = []
+    async def alert(self, message):
+        """Send messages to alerta, status records are sent concurrently
+
+        Records not changing severity or value of already sent alerts are skipped
+        """
         common_args = dict(
             environment=ALERTA_CONFIG.params['environment'],
             service=[self.config.alerta_service],
             resource=f'{ALERTA_CONFIG.params["resource"]}{message["source"]}',
             origin=ALERTA_CONFIG.params['origin']
         )
-        for record in message['status_list']:
-            if record['status'] in ['fail', 'no_data']:
-                report_id = self.alerta.send_alert(
-                    event=record['name'],
-                    value=create_msg(record),
-                    severity=ALERTA_CONFIG.params['severity'],
-                    **common_args,
-                )[0]
-            else:
-                report_id = self.alerta.send_alert(
-                    event=record['name'],
-                    severity='ok',
-                    **common_args,
-                )[0]
-
-            alerta_ids.append(report_id)
-            LOGGER.debug('Alerta message sent')
-        return alerta_ids
-
-    def process_heartbeat(self):
+        alerta_ids = await asyncio.gather(*[
+            self._send_record(record, common_args) for record in message['status_list']
+        ])
+        return list(alerta_ids)
+
+    async def _send_record(self, record, common_args: dict) -> str:
+        resource, event = common_args['resource'], record['name']
+        if record['status'] in ['fail', 'no_data']:
+            alert_args = dict(value=create_msg(record), severity=ALERTA_CONFIG.params['severity'])
+        else:
+            alert_args = dict(severity='ok')
+        severity, value = alert_args['severity'], alert_args.get('value')
+        report_id = self.index.unchanged(resource, event, severity, value)
+        if report_id is not None:
+            LOGGER.debug('Alert %s of %s is not changed', event, resource)
+            return report_id
+        report_id = await self.alerta.send_alert(event=event, **alert_args, **common_args)
+        self.index.update(resource, event, report_id, severity, value)
+        LOGGER.debug('Alerta message sent')
+        return report_id
+
+    async def process_heartbeat(self):
         """Process message for heartbeat report"""
         args = dict(
             origin=ALERTA_CONFIG.params['origin'],
@@ -95,18 +106,18 @@ class AlertaRunner:
         current_timestamp = datetime.utcnow().timestamp()
         if current_timestamp - self.last_heartbeat < self.HEARTBEAT_INTERVAL:
             return None
-        heartbeat = self.alerta.heartbeat(**args)
+        heartbeat_id = await self.alerta.heartbeat(**args)
         self.last_heartbeat = current_timestamp
-        return heartbeat.id
+        return heartbeat_id
 
-    def get_current_alerts(self, origin):
-        return self.alerta.get_alerts([('origin', origin), ('repeat', False)])
+    async def get_current_alerts(self, origin):
+        return await self.alerta.get_alerts([('origin', origin), ('repeat', False)])
 
-    def remove(self, alerta_ids):
+    async def remove(self, alerta_ids):
         """Remove message from alerta"""
         LOGGER.debug('Alerts removed from table')
-        for alerta_id in alerta_ids:
-            self.alerta.delete_alert(alerta_id)
+        self.index.discard(alerta_ids)
+        await asyncio.gather(*[self.alerta.delete_alert(alerta_id) for alerta_id in alerta_ids])
 
     async def start_posting(self):
         """Start posting updates to channel"""
@@ -115,30 +126,62 @@ class AlertaRunner:
         for topic in topics:
             await self.client.subscribe(topic)
         LOGGER.info('Alerta subscribed to topics: %s', topics)
-        while not self.stop_event.is_set():
-            # message consumed
-            message = await self.client.get(.1)
-            if self._send_heartbeats:
-                self.process_heartbeat()
-            if message is not None:
-                data = json.loads(message)
-                self.alert(data)  # check if TG response was 200
-
-    async def _stopper(self):
-        while not self.stop_event.is_set():
-            await asyncio.sleep(.5)
-        await self.client.stop_getting()
+        await self._seed_index()
+        stopped = watch_stop(self.stop_event)
+        delivering = asyncio.ensure_future(self.durable.deliver(self._deliver, stopped))
+        try:
+            while not stopped.done():
+                if self._send_heartbeats:
+                    await self._heartbeat()
+                batch = await next_batch(self.client, stopped, self._heartbeat_timeout())
+                if batch:
+                    await self.durable.append(batch)
+        finally:
+            stopped.cancel()
+            await asyncio.wait([delivering])
+            await self.durable.close()
+
+    async def _deliver(self, data):
+        """Send message to alerta, raise ``Undeliverable`` if it is rejected and other error if it is not sent"""
+        if not isinstance(data, (dict, StatusMessage)) or 'source' not in data or 'status_list' not in data:
+            raise Undeliverable(f'invalid message: {data}')
+        if not data['status_list']:
+            return
+        try:
+            await self.alert(data)
+        except AlertaError as ex:
+            if 400 <= ex.status < 500 and ex.status not in RETRIED_CLIENT_ERRORS:
+                raise Undeliverable(str(ex)) from ex
+            raise
+
+    async def _seed_index(self):
+        try:
+            self.index.seed(await self.get_current_alerts(ALERTA_CONFIG.params['origin']))
+        except Exception:  # pylint:disable=broad-except
+            LOGGER.exception('Failed to load current alerts, all alerts will be sent')
+            return
+        LOGGER.info('Loaded %s current alerts', len(self.index))
+
+    async def _heartbeat(self):
+        try:
+            await self.process_heartbeat()
+        except Exception:  # pylint:disable=broad-except
+            LOGGER.exception('Failed to send heartbeat')
+            self.last_heartbeat = datetime.utcnow().timestamp()  # retry on next interval
+
+    def _heartbeat_timeout(self):
+        if not self._send_heartbeats:
+            return None
+        return max(self.last_heartbeat + self.HEARTBEAT_INTERVAL - datetime.utcnow().timestamp(), 0)
 
     async def start(self):
         """Start alerta"""
+        try:
+            await self.start_posting()
+        finally:
+            self.client.stop_getting()
+            await self.alerta.close()
 
-        self._alerta_thread = threading.Thread(
-            target=lambda: asyncio.run(self.start_posting()),
-            name='Alerta-Thread')
-        self._alerta_thread.start()
-        await self._stopper()
-        self._alerta_thread.join()
-
-    def stop(self, stop_event: threading.Event):
+    def stop(self, stop_event: StopEvent):
         """Stop alerta"""
         self.stop_event = stop_event
@@ -0,0 +1,97 @@
+"""Asynchronous client of Alerta API"""
+import asyncio
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+import aiohttp
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+MAX_CONCURRENCY = 8
+POOL_SIZE = 16
+KEEPALIVE_TIMEOUT = 60
+REQUEST_TIMEOUT = 10
+
+
+class AlertaError(Exception):
+    """Alerta API responded with error"""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(f'Alerta API error {status}: {message}')
+        self.status = status
+
+
+class AlertaApi:
+    """Alerta API client, has to be used (and closed) in single event loop"""
+
+    # pylint: disable=too-many-arguments
+
+    def __init__(self, endpoint: str, key: str = None, max_concurrency: int = MAX_CONCURRENCY,
+                 pool_size: int = POOL_SIZE, keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+                 timeout: float = REQUEST_TIMEOUT):
+        self.endpoint = endpoint.rstrip('/')
+        self.headers = {'Content-Type': 'application/json'}
+        if key:
+            self.headers['Authorization'] = f'Key {key}'
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return session, create new if missing"""
+        if self._session is None or self._session.closed:
+            LOGGER.debug('Creating new Alerta session for %s', self.endpoint)
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limiter of API requests"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def request(self, method: str, path: str, json: dict = None, params: Iterable[Tuple] = None) -> dict:
+        """Send request to API and return JSON response"""
+        async with self.semaphore:
+            async with self.session.request(method, f'{self.endpoint}{path}', json=json,
+                                            params=params) as response:
+                try:
+                    data = await response.json(content_type=None)
+                except ValueError:
+                    data = {'message': await response.text()}
+        if response.status >= 400 or (data or {}).get('status') == 'error':
+            raise AlertaError((data or {}).get('message', ''), response.status)
+        return data
+
+    async def send_alert(self, resource: str, event: str, **kwargs) -> str:
+        """Create or update alert, return its ID"""
+        data = await self.request('POST', '/alert', json=dict(resource=resource, event=event, **kwargs))
+        return data['id']
+
+    async def delete_alert(self, alert_id: str):
+        await self.request('DELETE', f'/alert/{alert_id}')
+
+    async def get_alerts(self, query: Iterable[Tuple] = None) -> List[dict]:
+        data = await self.request('GET', '/alerts', params=[(key, str(value)) for key, value in query or ()])
+        return data['alerts']
+
+    async def heartbeat(self, origin: str, tags: List[str] = None, timeout: int = None) -> str:
+        """Send heartbeat, return its ID"""
+        data = await self.request('POST', '/heartbeat', json=dict(origin=origin, tags=tags or [], timeout=timeout))
+        return data['id']
+
+    async def get_heartbeat(self, heartbeat_id: str) -> dict:
+        data = await self.request('GET', f'/heartbeat/{heartbeat_id}')
+        return data['heartbeat']
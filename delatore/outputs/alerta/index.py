@@ -0,0 +1,52 @@
+"""Local state of alerts sent to Alerta"""
+import time
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+REFRESH_INTERVAL = 12 * 3600  # unchanged alerts are sent again before default Alerta timeout (24h) expires them
+
+
+class AlertState(NamedTuple):
+    """Last sent state of the alert"""
+    alert_id: str
+    severity: str
+    value: Optional[str]
+    sent_at: float
+
+
+AlertKey = Tuple[str, str]  # resource, event
+
+
+class AlertIndex:
+    """Severity and value last sent for each ``(resource, event)``"""
+
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._alerts: Dict[AlertKey, AlertState] = {}
+
+    def unchanged(self, resource: str, event: str, severity: str, value: Optional[str]) -> Optional[str]:
+        """Return ID of the alert if it was already sent with the same severity and value recently"""
+        state = self._alerts.get((resource, event))
+        if state is None or (state.severity, state.value) != (severity, value or None):
+            return None
+        if time.monotonic() - state.sent_at >= self.refresh_interval:
+            return None
+        return state.alert_id
+
+    def update(self, resource: str, event: str, alert_id: str, severity: str, value: Optional[str],
+               sent_at: float = None):
+        if sent_at is None:
+            sent_at = time.monotonic()
+        self._alerts[(resource, event)] = AlertState(alert_id, severity, value or None, sent_at)
+
+    def seed(self, alerts: Iterable[dict]):
+        """Fill index with alerts existing in Alerta"""
+        for alert in alerts:
+            self.update(alert['resource'], alert['event'], alert['id'], alert['severity'], alert.get('value'))
+
+    def discard(self, alert_ids: Iterable[str]):
+        alert_ids = set(alert_ids)
+        for key in [key for key, state in self._alerts.items() if state.alert_id in alert_ids]:
+            del self._alerts[key]
+
+    def __len__(self):
+        return len(self._alerts)
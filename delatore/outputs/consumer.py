@@ -0,0 +1,23 @@
+"""Receiving of published messages by outputs"""
+import asyncio
+from typing import Any, List, Optional
+
+from ..signals import StopEvent, wait_stopped
+
+
+def watch_stop(stop_event: StopEvent) -> asyncio.Future:
+    """Return future done when stop event is set, it has to be cancelled when not needed"""
+    return asyncio.ensure_future(wait_stopped(stop_event))
+
+
+async def next_batch(client, stopped: asyncio.Future, timeout: Optional[float] = None) -> List[Any]:
+    """Wait for published message and return it with all already received ones
+
+    Empty list is returned if ``stopped`` is done or nothing is received in ``timeout`` seconds
+    """
+    getter = asyncio.ensure_future(client.get(None))
+    await asyncio.wait([getter, stopped], timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    if not getter.done():
+        getter.cancel()
+        return []
+    return [getter.result(), *client.get_all()]
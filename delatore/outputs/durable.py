@@ -0,0 +1,244 @@
+"""Durable queue of messages received by outputs"""
+import asyncio
+import logging
+import sqlite3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..serialization import CODECS, JSON, decode, get_codec
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+IN_MEMORY = ':memory:'
+BATCH_SIZE = 100
+RETRY_INTERVAL = 1.0
+MAX_RETRY_INTERVAL = 60.0
+MAX_ATTEMPTS = 10  # failed deliveries of single message before it's moved to dead letters
+MAX_ID = 2 ** 63 - 1  # largest SQLite integer
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    output TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_output ON messages (output, id);
+CREATE TABLE IF NOT EXISTS cursors (
+    output TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY,
+    output TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    error TEXT NOT NULL
+);
+'''
+
+Deliver = Callable[[Any], Awaitable]
+
+
+class Undeliverable(Exception):
+    """Raised by output for message which is rejected by receiver, such message is not retried"""
+
+
+def _to_json(message, data) -> str:
+    """Return JSON form of the message, received JSON payload is stored as is"""
+    if isinstance(message, str) and get_codec().name == JSON:
+        return message
+    if hasattr(data, 'to_json'):
+        return data.to_json()
+    return CODECS[JSON].dumps(data)
+
+
+class DurableOutbox:
+    """Message log of single output, ``path`` can be shared by several outputs"""
+
+    # pylint: disable=too-many-arguments
+
+    def __init__(self, output: str, path: str = IN_MEMORY, batch_size: int = BATCH_SIZE,
+                 retry_interval: float = RETRY_INTERVAL, max_retry_interval: float = MAX_RETRY_INTERVAL,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self.output = output
+        self.path = path
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.max_attempts = max_attempts
+        self._attempts: Dict[int, int] = {}  # failed deliveries of messages by ID
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'{output}-outbox')
+        self._db: Optional[sqlite3.Connection] = None
+        self._appended: Optional[asyncio.Event] = None
+        self._replay_end = 0  # last message stored before the start
+        self._replaying = True
+        self._received: Deque[Tuple[int, Any]] = deque()  # not delivered messages appended by the process
+
+    @property
+    def appended(self) -> asyncio.Event:
+        if self._appended is None:
+            self._appended = asyncio.Event()
+        return self._appended
+
+    async def _run(self, func, *args):
+        return await asyncio.get_event_loop().run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=FULL')
+            self._db.executescript(_SCHEMA)
+            row = self._db.execute('SELECT MAX(id) FROM messages WHERE output = ?', (self.output,)).fetchone()
+            self._replay_end = row[0] or 0
+        return self._db
+
+    def _append(self, payloads: List[str]) -> List[int]:
+        db = self._connect()
+        with db:
+            db.execute('BEGIN')
+            return [db.execute('INSERT INTO messages (output, payload) VALUES (?, ?)',
+                               (self.output, payload)).lastrowid for payload in payloads]
+
+    def _pending(self, last: int = MAX_ID) -> List[Tuple[int, str]]:
+        """Return not delivered messages with ID not greater than ``last``"""
+        db = self._connect()
+        row = db.execute('SELECT position FROM cursors WHERE output = ?', (self.output,)).fetchone()
+        position = row[0] if row else 0
+        return db.execute('SELECT id, payload FROM messages WHERE output = ? AND id > ? AND id <= ? '
+                          'ORDER BY id LIMIT ?', (self.output, position, last, self.batch_size)).fetchall()
+
+    def _replayed(self) -> List[Tuple[int, str]]:
+        """Return not delivered messages stored before the start"""
+        self._connect()  # sets ``_replay_end``
+        return self._pending(self._replay_end)
+
+    def _advance(self, position: int):
+        db = self._connect()
+        with db:
+            db.execute('BEGIN')
+            db.execute('INSERT OR REPLACE INTO cursors (output, position) VALUES (?, ?)',
+                       (self.output, position))
+            db.execute('DELETE FROM messages WHERE output = ? AND id <= ?', (self.output, position))
+
+    def _bury(self, row_id: int, error: str):
+        db = self._connect()
+        with db:
+            db.execute('BEGIN')
+            db.execute('INSERT OR REPLACE INTO dead_letters (id, output, payload, error) '
+                       'SELECT id, output, payload, ? FROM messages WHERE id = ?', (error, row_id))
+
+    def _dead_letters(self) -> List[Tuple[int, str, str]]:
+        db = self._connect()
+        return db.execute('SELECT id, payload, error FROM dead_letters WHERE output = ? ORDER BY id',
+                          (self.output,)).fetchall()
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def append(self, messages: List[Any]):
+        """Store received messages, they are stored as JSON regardless of bus and codec used
+
+        Decoded messages are kept until delivered, so they are not parsed again
+        """
+        decoded = [decode(message) for message in messages]
+        payloads = [_to_json(message, data) for message, data in zip(messages, decoded)]
+        row_ids = await self._run(self._append, payloads)
+        self._received.extend(zip(row_ids, decoded))
+        self.appended.set()
+
+    async def pending(self) -> List[Tuple[int, str]]:
+        """Return next batch of not delivered messages as stored"""
+        return await self._run(self._pending)
+
+    async def dead_letters(self) -> List[Tuple[int, str, str]]:
+        """Return messages given up by the output with their errors"""
+        return await self._run(self._dead_letters)
+
+    async def _next_batch(self) -> List[Tuple[int, Any]]:
+        """Return next batch of not delivered messages, stored before the start ones go first"""
+        if self._replaying:
+            rows = await self._run(self._replayed)
+            if rows:
+                return [(row_id, CODECS[JSON].loads(payload)) for row_id, payload in rows]
+            self._replaying = False
+        return list(islice(self._received, self.batch_size))
+
+    async def _delivered(self, position: int):
+        await self._run(self._advance, position)
+        while self._received and self._received[0][0] <= position:
+            self._received.popleft()
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+    async def _settled(self, row_id: int, error: Optional[BaseException]) -> bool:
+        """Return ``True`` if message is delivered or given up and moved to dead letters"""
+        attempts = self._attempts.pop(row_id, 0) + 1
+        if error is None:
+            return True
+        if isinstance(error, Undeliverable):
+            LOGGER.error('Message %s is rejected by %s: %r', row_id, self.output, error)
+        elif attempts >= self.max_attempts:
+            LOGGER.error('Failed to deliver message %s to %s in %s attempts: %r', row_id, self.output, attempts, error)
+        else:
+            self._attempts[row_id] = attempts
+            return False
+        await self._run(self._bury, row_id, repr(error))
+        return True
+
+    async def _wait_appended(self, stopped: asyncio.Future):
+        waiter = asyncio.ensure_future(self.appended.wait())
+        await asyncio.wait([waiter, stopped], return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+
+    async def deliver(self, deliver: Deliver, stopped: asyncio.Future, concurrent: bool = False):
+        """Deliver stored messages until ``stopped`` is done
+
+        Messages of the batch are delivered one by one or, if ``concurrent`` is set, all at once.
+        Cursor is moved past delivered messages. Messages rejected with ``Undeliverable``
+        or failed ``max_attempts`` times are moved to dead letters and skipped
+        """
+        interval = self.retry_interval
+        while not stopped.done():
+            self.appended.clear()
+            batch = await self._next_batch()
+            if not batch:
+                await self._wait_appended(stopped)
+                continue
+            done = 0  # delivered or given up messages
+            if concurrent:
+                errors = await asyncio.gather(*[_deliver(deliver, message) for _, message in batch])
+                for (row_id, _), error in zip(batch, errors):
+                    if not await self._settled(row_id, error):
+                        break
+                    done += 1
+            else:
+                for row_id, message in batch:
+                    error = await _deliver(deliver, message)
+                    if not await self._settled(row_id, error):
+                        break
+                    done += 1
+            if done:
+                await self._delivered(batch[done - 1][0])
+            if done == len(batch):
+                interval = self.retry_interval
+                continue
+            LOGGER.warning('Failed to deliver message to %s, retry in %ss: %r',
+                           self.output, interval, error)
+            await asyncio.wait([stopped], timeout=interval)  # new messages don't interrupt backoff
+            interval = min(interval * 2, self.max_retry_interval)
+
+
+async def _deliver(deliver: Deliver, message) -> Optional[BaseException]:
+    """Deliver single message, return error if delivery failed"""
+    try:
+        await deliver(message)
+    except (Exception, asyncio.CancelledError) as ex:  # pylint:disable=broad-except
+        return ex  # sending cancelled on shutdown is delivered after restart
+    return None
@@ -0,0 +1,103 @@
+"""Status board: single pinned chat message per source edited on status changes"""
+import json
+import logging
+import os
+import time
+from typing import Dict, NamedTuple, Optional
+
+from aiogram.utils.exceptions import BadRequest, MessageNotModified
+
+from .json2mdwn import convert
+from ...unified_json import Status
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+BOARD_FILE = 'status_board.json'
+BOARD_TTL = 600  # seconds error report statuses are kept without being reported again
+FAILING = frozenset({Status.FAIL.value, Status.ALERTING.value})
+
+
+class Board(NamedTuple):
+    """Board message of the source and statuses shown in it"""
+    message_id: int
+    statuses: Dict[str, str]
+    expires: Optional[float] = None  # POSIX time statuses of error report expire at
+
+
+def _load(path: str) -> Dict[str, Board]:
+    try:
+        with open(path, encoding='utf-8') as board_file:
+            data = json.load(board_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        LOGGER.exception('Failed to load status boards from %s', path)
+        return {}
+    return {
+        source: Board(board['message_id'], board['statuses'], board.get('expires'))
+        for source, board in data.items()
+    }
+
+
+class StatusBoard:
+    """Status boards of all sources posted by the bot runner"""
+
+    def __init__(self, runner, path: str = BOARD_FILE, ttl: float = BOARD_TTL):
+        self.runner = runner
+        self.path = path
+        self.ttl = ttl
+        self.boards = _load(path)
+
+    def _save(self):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as board_file:
+            json.dump({source: board._asdict() for source, board in self.boards.items()}, board_file)
+        os.replace(tmp_path, self.path)
+
+    async def _edit(self, message_id: int, text: str) -> bool:
+        """Edit board message, return ``False`` if message can't be edited"""
+        await self.runner.outbox.bucket.acquire()
+        try:
+            await self.runner.bot.edit_message_text(text, self.runner.chat_id, message_id)
+        except MessageNotModified:
+            pass
+        except BadRequest as ex:
+            LOGGER.warning('Board message %s can\'t be edited: %s', message_id, ex)
+            return False
+        return True
+
+    async def _post(self, text: str) -> int:
+        """Send and pin new board message, return its ID"""
+        await self.runner.outbox.bucket.acquire()
+        message = await self.runner.silent(text)
+        try:
+            await self.runner.bot.pin_chat_message(self.runner.chat_id, message.message_id,
+                                                   disable_notification=True)
+        except BadRequest as ex:
+            LOGGER.warning('Board message %s is not pinned: %s', message.message_id, ex)
+        return message.message_id
+
+    async def update(self, data):
+        """Show new statuses of the source on its board, notify about records switched to failing
+
+        Records missing in the new message and expired statuses are not failing anymore
+        """
+        source = data['source']
+        now = time.time()
+        board: Optional[Board] = self.boards.get(source)
+        previous, previous_expires = {}, None
+        if board is not None and (board.expires is None or now < board.expires):
+            previous, previous_expires = board.statuses, board.expires
+        statuses = {record['name']: record['status'] for record in data['status_list']}
+        expires = now + self.ttl if any('error' in record for record in data['status_list']) else None
+        text = convert(data)
+        if board is None or not await self._edit(board.message_id, text):
+            self.boards[source] = Board(await self._post(text), previous, previous_expires)
+            self._save()
+        switched = [record for record in data['status_list']
+                    if record['status'] in FAILING and previous.get(record['name']) not in FAILING]
+        if switched:  # statuses are stored after notification is sent, so it is repeated on retry
+            await self.runner.outbox.post(convert({'source': source, 'status_list': switched}))
+        self.boards[source] = Board(self.boards[source].message_id, statuses, expires)
+        self._save()
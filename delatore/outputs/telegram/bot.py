@@ -1,18 +1,24 @@
 import asyncio
-import json
 import logging
-import threading
+import os
+from typing import Optional
 
 from aiogram import Bot, Dispatcher
 from aiogram.types import Message
+from aiogram.utils.exceptions import BadRequest
 from aiogram.utils.markdown import escape_md
 from apubsub import Service
 from ocomone import Resources
 
+from .board import BOARD_FILE, BOARD_TTL, StatusBoard
+from .outbox import BURST, MERGE_WINDOW, MESSAGES_PER_MINUTE, Outbox, TokenBucket
 from .parsing import CommandParsingError, parse_command
+from ..consumer import next_batch, watch_stop
+from ..durable import DurableOutbox, IN_MEMORY, Undeliverable
 from ...configuration import OUTPUTS_CFG
 from ...configuration.dynamic import DEFAULT_INSTANCE_CONFIG, InstanceConfig
 from ...outputs.telegram.json2mdwn import convert
+from ...signals import StopEvent, wait_stopped
 from ...sources import AWXApiSource
 
 LOGGER = logging.getLogger(__name__)
@@ -60,12 +66,22 @@ class BotRunner:
     _bot: Bot = None
     _dispatcher: Dispatcher = None
 
-    def __init__(self, msg_service: Service, stop_event: threading.Event,
-                 config: InstanceConfig = DEFAULT_INSTANCE_CONFIG):
+    def __init__(self, msg_service: Service, stop_event: StopEvent,
+                 config: InstanceConfig = DEFAULT_INSTANCE_CONFIG, outbox_path: str = IN_MEMORY,
+                 state_dir: str = '.'):
         self.client = msg_service.get_client()
+        self.durable = DurableOutbox(TG_CONFIG.name, outbox_path)
         self.stop_event = stop_event
         self.config = config
         self.chat_id = config.chat_id
+        params = TG_CONFIG.params
+        bucket = TokenBucket.per_minute(params.get('messages_per_minute', MESSAGES_PER_MINUTE),
+                                        params.get('burst', BURST))
+        self.outbox = Outbox(self._send, bucket, merge_window=params.get('merge_window', MERGE_WINDOW))
+        self.board: Optional[StatusBoard] = None
+        if params.get('status_board', False):
+            board_file = os.path.join(state_dir, params.get('board_file', BOARD_FILE))
+            self.board = StatusBoard(self, board_file, params.get('board_ttl', BOARD_TTL))
 
     @property
     def bot(self):
@@ -109,6 +125,14 @@ class BotRunner:
         LOGGER.debug('Message (silent) sent to the chat %s:\n %s', self.chat_id, message)
         return await self.bot.send_message(self.chat_id, message, disable_notification=True)
 
+    async def _send(self, message, silent: bool):
+        try:
+            if silent:
+                return await self.silent(message)
+            return await self.alert(message)
+        except BadRequest as ex:
+            raise Undeliverable(f'post is rejected: {ex}') from ex
+
     async def remove(self, message_id):
         """Remove message from chat"""
         LOGGER.debug('Message %s removed from chat %s', message_id, self.chat_id)
@@ -122,21 +146,40 @@ class BotRunner:
             self.client.subscribe(topic) for topic in topics
         ])
         LOGGER.info('Bot subscribed to topics: %s', topics)
-        await self.silent('__Bot started__')
-        while not self.stop_event.is_set():
-            # message consumed
-            message = await self.client.get(.1)
-            if message is not None:
-                data = json.loads(message)
-                if 'status_list' in data and data['status_list']:
-                    try:
-                        await self.alert(convert(data))  # check if TG response was 200
-                    except Exception:  # pylint:disable=broad-except
-                        LOGGER.exception('Failed to send message %s', data)
+        self.outbox.put('__Bot started__', silent=True)
+        stopped = watch_stop(self.stop_event)
+        sending = asyncio.ensure_future(self.outbox.run(stopped))
+        # posts are merged by outbox, so delivered concurrently unless board is updated
+        delivering = asyncio.ensure_future(
+            self.durable.deliver(self._post, stopped, concurrent=self.board is None))
+        try:
+            while not stopped.done():
+                batch = await next_batch(self.client, stopped)
+                if batch:
+                    await self.durable.append(batch)
+        finally:
+            stopped.cancel()
+            await asyncio.wait([sending, delivering])
+            await self.durable.close()
+
+    async def _post(self, data):
+        """Post message to the chat, raise ``Undeliverable`` if it is rejected and other error if it is not sent"""
+        if not ('status_list' in data and data['status_list']):
+            return
+        if self.board is not None:
+            try:
+                await self.board.update(data)
+            except BadRequest as ex:
+                raise Undeliverable(f'board is rejected: {ex}') from ex
+            return
+        try:
+            text = convert(data)
+        except Exception as ex:  # pylint:disable=broad-except
+            raise Undeliverable(f'failed to convert message: {ex!r}') from ex
+        await self.outbox.post(text)
 
     async def _stopper(self):
-        while not self.stop_event.is_set():
-            await asyncio.sleep(.1)
+        await wait_stopped(self.stop_event)
         self.client.stop_getting()
         self.dispatcher.stop_polling()
         await self.dispatcher.storage.close()
@@ -0,0 +1,164 @@
+"""Outgoing queue of chat posts"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..durable import Undeliverable
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+MESSAGE_LIMIT = 4096  # max length of Telegram message text
+MERGE_WINDOW = 1.0
+MESSAGES_PER_MINUTE = 20  # Telegram limit for single group chat
+BURST = 3
+SEPARATOR = '\n\n'
+
+
+class TokenBucket:
+    """Rate limiter allowing ``capacity`` immediate acquisitions refilled with ``rate`` per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    @classmethod
+    def per_minute(cls, messages: int = MESSAGES_PER_MINUTE, burst: int = BURST) -> 'TokenBucket':
+        """Bucket which never allows more than ``messages`` in any minute"""
+        return cls((messages - burst) / 60, burst)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Return seconds until next token is available"""
+        self._refill()
+        return max(1 - self._tokens, 0) / self.rate
+
+    async def acquire(self):
+        """Wait for a token and take it"""
+        while True:
+            delay = self.delay()
+            if delay <= 0:
+                self._tokens -= 1
+                return
+            await asyncio.sleep(delay)
+
+
+def _split(text: str, limit: int) -> Tuple[str, str]:
+    """Split text at the last line break fitting into the limit"""
+    cut = text.rfind('\n', 0, limit)
+    if cut <= 0:
+        return text[:limit], text[limit:]
+    return text[:cut], text[cut + 1:]
+
+
+Send = Callable[[str, bool], Awaitable]  # (text, silent)
+_Pending = Tuple[str, Optional[asyncio.Future]]  # text, future done when text is sent
+
+
+class Outbox:
+    """Merging and rate limiting queue of posts"""
+
+    def __init__(self, send: Send, bucket: TokenBucket = None, merge_window: float = MERGE_WINDOW,
+                 limit: int = MESSAGE_LIMIT):
+        self.send = send
+        self.bucket = bucket or TokenBucket.per_minute()
+        self.merge_window = merge_window
+        self.limit = limit
+        self._pending: Dict[bool, Deque[_Pending]] = {False: deque(), True: deque()}
+        self._received: Optional[asyncio.Event] = None
+
+    @property
+    def received(self) -> asyncio.Event:
+        if self._received is None:
+            self._received = asyncio.Event()
+        return self._received
+
+    def put(self, text: str, silent: bool = False, sent: asyncio.Future = None):
+        """Add text to be posted, ``sent`` future is done when post containing the text is sent"""
+        self._pending[silent].append((text, sent))
+        self.received.set()
+
+    async def post(self, text: str, silent: bool = False):
+        """Add text to be posted and wait until it is sent, raise if sending failed"""
+        sent = asyncio.get_event_loop().create_future()
+        self.put(text, silent, sent)
+        await sent
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._pending.values())
+
+    def _take(self) -> Optional[Tuple[bool, List[_Pending]]]:
+        """Take pending texts of the highest priority fitting into single post"""
+        for silent in (False, True):
+            queue = self._pending[silent]
+            if not queue:
+                continue
+            text, sent = queue[0]
+            if len(text) > self.limit:
+                head, rest = _split(text, self.limit)
+                queue[0] = (rest, sent)
+                return silent, [(head, None)]
+            parts: List[_Pending] = []
+            size = -len(SEPARATOR)
+            while queue and size + len(SEPARATOR) + len(queue[0][0]) <= self.limit:
+                parts.append(queue.popleft())
+                size += len(SEPARATOR) + len(parts[-1][0])
+            return silent, parts
+        return None
+
+    async def _send(self, text: str, silent: bool) -> Optional[Exception]:
+        """Send single post, return error if sending failed"""
+        try:
+            await self.send(text, silent)
+        except Exception as ex:  # pylint:disable=broad-except
+            LOGGER.exception('Failed to send post:\n%s', text)
+            return ex
+        return None
+
+    async def run(self, stopped: asyncio.Future):
+        """Send pending posts until ``stopped`` is done"""
+        while not stopped.done():
+            if not self:
+                self.received.clear()
+                waiter = asyncio.ensure_future(self.received.wait())
+                await asyncio.wait([waiter, stopped], return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                continue
+            await asyncio.sleep(self.merge_window)
+            while self and not stopped.done():
+                await self.bucket.acquire()
+                silent, parts = self._take()
+                error = await self._send(SEPARATOR.join(text for text, _ in parts), silent)
+                if len(parts) > 1 and isinstance(error, Undeliverable):
+                    # don't let single rejected text fail the others merged with it
+                    LOGGER.warning('Merged post is rejected, sending %s parts separately', len(parts))
+                    for text, sent in parts:
+                        await self.bucket.acquire()
+                        _resolve([sent], await self._send(text, silent))
+                    continue
+                _resolve([sent for _, sent in parts], error)
+        if self:
+            LOGGER.warning('%s pending posts are not sent', len(self))
+            for queue in self._pending.values():
+                for _, sent in queue:
+                    if sent is not None:
+                        sent.cancel()
+                queue.clear()
+
+
+def _resolve(futures: List[Optional[asyncio.Future]], error: Exception = None):
+    for future in futures:
+        if future is None or future.done():
+            continue
+        if error is None:
+            future.set_result(True)
+        else:
+            future.set_exception(error)
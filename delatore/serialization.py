@@ -0,0 +1,130 @@
+"""Wire format of messages sent over pub/sub"""
+import base64
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+DECODED_CACHE_SIZE = 64
+
+
+class Codec:
+    """Pair of text serialisation functions"""
+
+    __slots__ = ('name', 'dumps', 'loads')
+
+    def __init__(self, name: str, dumps: Callable[[Any], str], loads: Callable[[str], Any]):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        return f'Codec({self.name!r})'
+
+
+def _json_codec() -> Codec:
+    if orjson is None:
+        return Codec(JSON, json.dumps, json.loads)
+    return Codec(JSON, lambda obj: orjson.dumps(obj).decode(), orjson.loads)
+
+
+def _msgpack_codec() -> Codec:
+    def _dumps(obj) -> str:
+        return base64.b64encode(msgpack.packb(obj, use_bin_type=True)).decode()
+
+    def _loads(data: str):
+        return msgpack.unpackb(base64.b64decode(data), raw=False)
+
+    return Codec(MSGPACK, _dumps, _loads)
+
+
+CODECS: Dict[str, Codec] = {JSON: _json_codec()}
+if msgpack is not None:
+    CODECS[MSGPACK] = _msgpack_codec()
+
+_codec = CODECS[JSON]
+
+
+def get_codec() -> Codec:
+    """Return codec used for pub/sub messages"""
+    return _codec
+
+
+def set_codec(name: str):
+    """Select codec used for pub/sub messages, has to be done before sources and outputs are started"""
+    global _codec  # pylint:disable=global-statement
+    if name not in CODECS:
+        raise ValueError(f'Codec {name} is not available, use one of: {", ".join(sorted(CODECS))}')
+    _codec = CODECS[name]
+    _DECODED.clear()
+
+
+def dumps_json(obj) -> str:
+    """Serialise object to JSON string using the fastest available library"""
+    return CODECS[JSON].dumps(obj)
+
+
+def encode(message, client=None):
+    """Serialise message, JSON form cached by the message itself is reused
+
+    Message is returned as is if it is going to be published with client of in-process bus
+    """
+    if getattr(client, 'by_reference', False):
+        return message
+    if _codec.name == JSON and hasattr(message, 'to_json'):
+        return message.to_json()
+    if hasattr(message, 'to_dict'):
+        message = message.to_dict()
+    return _codec.dumps(message)
+
+
+class _DecodedCache:
+    """LRU of decoded payloads shared by subscribers running in different threads"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._items: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, payload: str, loads: Callable[[str], Any]):
+        with self._lock:
+            try:
+                self._items.move_to_end(payload)
+                return self._items[payload]
+            except KeyError:
+                pass
+        value = loads(payload)
+        with self._lock:
+            self._items[payload] = value
+            if len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_DECODED = _DecodedCache(DECODED_CACHE_SIZE)
+
+
+def decode(payload):
+    """Deserialise received message, payloads already decoded in the process are not parsed again
+
+    Messages received from in-process bus are returned as is
+    """
+    if not isinstance(payload, str):
+        return payload
+    return _DECODED.get(payload, _codec.loads)
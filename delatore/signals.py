@@ -0,0 +1,60 @@
+"""Shutdown signal shared by sources and outputs running in different threads"""
+import asyncio
+import threading
+from typing import List, Tuple, Union
+
+STOP_CHECK_INTERVAL = .5  # used for events which can't be awaited
+
+
+class StopSignal:
+    """Stop flag which can be set from any thread and awaited in event loop of any thread"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def set(self):
+        """Set the signal and wake up all waiters"""
+        with self._lock:
+            self._event.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, waiter in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_resolve, waiter)
+
+    async def wait(self) -> bool:
+        """Wait until the signal is set"""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        with self._lock:
+            if self._event.is_set():
+                return True
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        finally:
+            with self._lock:
+                if (loop, waiter) in self._waiters:
+                    self._waiters.remove((loop, waiter))
+        return True
+
+
+def _resolve(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(True)
+
+
+StopEvent = Union[StopSignal, asyncio.Event, threading.Event]
+
+
+async def wait_stopped(stop_event: StopEvent):
+    """Wait for stop event, events bound to other threads are checked periodically"""
+    if isinstance(stop_event, StopSignal):
+        await stop_event.wait()
+        return
+    while not stop_event.is_set():
+        await asyncio.sleep(STOP_CHECK_INTERVAL)
@@ -8,32 +8,46 @@ from .http import AWXWebHookSource
 from .influx import (InfluxSource, InfluxSourceAutoscaling, InfluxSourceDiskStateRead, InfluxSourceDiskStateReadSFS,
                      InfluxSourceDiskStateWrite, InfluxSourceDiskStateWriteSFS, InfluxSourceLBDOWN,
                      InfluxSourceLBDOWNFailCount, InfluxSourceLBTiming, InfluxSourceRDSTest, InfluxSourceSFSStatus)
+from .influx_client import close_influx_clients
+from .scheduling import COALESCED, SCHEDULERS
 from ..configuration import InstanceConfig
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.INFO)
 
 
-async def start_sources(msg_service: Service, stop_event: asyncio.Event, config: InstanceConfig):
-    """Start all sources and make them report to message queue"""
+async def start_sources(msg_service: Service, stop_event: asyncio.Event, config: InstanceConfig,
+                        schedule: str = COALESCED):
+    """Start all sources and make them report to message queue
+
+    ``schedule`` is name of scheduler used for Influx sources
+    """
     await asyncio.wait([
         AWXApiSource(msg_service.get_client(), instance_config=config).start(stop_event),
         AWXWebHookSource(msg_service.get_client()).start(stop_event),
-        start_influx_sources(msg_service, stop_event, config)
+        start_influx_sources(msg_service, stop_event, config, schedule)
     ])
 
 
-async def start_influx_sources(msg_service: Service, stop_event: asyncio.Event, config: InstanceConfig):
-    await asyncio.wait([
-        InfluxSource(msg_service.get_client(), instance_config=config).start(stop_event),
-        InfluxSourceLBTiming(msg_service.get_client(), instance_config=config).start(stop_event),
-        InfluxSourceLBDOWN(msg_service.get_client(), instance_config=config).start(stop_event),
-        InfluxSourceLBDOWNFailCount(msg_service.get_client(), instance_config=config).start(stop_event),
-        InfluxSourceDiskStateRead(msg_service.get_client(), instance_config=config).start(stop_event),
-        InfluxSourceDiskStateWrite(msg_service.get_client(), instance_config=config).start(stop_event),
-        InfluxSourceDiskStateReadSFS(msg_service.get_client(), instance_config=config).start(stop_event),
-        InfluxSourceDiskStateWriteSFS(msg_service.get_client(), instance_config=config).start(stop_event),
-        InfluxSourceSFSStatus(msg_service.get_client(), instance_config=config).start(stop_event),
-        InfluxSourceAutoscaling(msg_service.get_client(), instance_config=config).start(stop_event),
-        InfluxSourceRDSTest(msg_service.get_client(), instance_config=config).start(stop_event)
-    ])
+INFLUX_SOURCES = (
+    InfluxSource,
+    InfluxSourceLBTiming,
+    InfluxSourceLBDOWN,
+    InfluxSourceLBDOWNFailCount,
+    InfluxSourceDiskStateRead,
+    InfluxSourceDiskStateWrite,
+    InfluxSourceDiskStateReadSFS,
+    InfluxSourceDiskStateWriteSFS,
+    InfluxSourceSFSStatus,
+    InfluxSourceAutoscaling,
+    InfluxSourceRDSTest,
+)
+
+
+async def start_influx_sources(msg_service: Service, stop_event: asyncio.Event, config: InstanceConfig,
+                               schedule: str = COALESCED):
+    sources = [src_cls(msg_service.get_client(), instance_config=config) for src_cls in INFLUX_SOURCES]
+    try:
+        await SCHEDULERS[schedule](sources).start(stop_event)
+    finally:
+        await close_influx_clients()
@@ -1,11 +1,13 @@
 import asyncio
 import logging
 from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
 
 from aiohttp import ClientSession
 from apubsub.client import Client
 
 from .base import NoUpdates, Source
+from .circuit_breaker import check_status, get_circuit_breaker
 from ..configuration import InstanceConfig
 from ..unified_json import Status, convert_timestamp, generate_error, generate_message, generate_status
 
@@ -39,6 +41,7 @@ class AWXApiSource(Source):
     """AWX API Client"""
 
     CONFIG_ID = 'awx_api'
+    event_driven = True
     _params: Optional[AWXParams] = None
 
     async def get_update(self):
@@ -93,10 +96,11 @@ class AWXApiSource(Source):
         This methods support Ansible tower filtering
         https://docs.ansible.com/ansible-tower/latest/html/towerapi/filtering.html
         """
-        async with self.get_session() as session:
+        host = urlparse(self.params().host).hostname
+        async with get_circuit_breaker(host).guard(), self.get_session() as session:
             async with session.get(self.params().host + '/job_templates', params=filters, timeout=5) as response:
+                check_status(host, response.status)
                 response_data = await response.json()
-            assert response.status == 200, f'Expected response 200, got {response.status}'
         try:
             container = [
                 _create_record(result, j)
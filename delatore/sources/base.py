@@ -1,16 +1,21 @@
 """Base Source implementation"""
 
 import asyncio
-import json
 import logging
+import random
+import zlib
 from abc import ABC, ABCMeta, abstractmethod
+from enum import Enum
 from inspect import isabstract
 from typing import NamedTuple, Optional, Union
 
 from apubsub.client import Client
 
+from .circuit_breaker import UpstreamUnavailable
 from ..configuration import DEFAULT_INSTANCE_CONFIG, InstanceConfig, SOURCES_CFG
 from ..configuration.static import SourceConfiguration
+from ..serialization import encode
+from ..unified_json import Message, Status, StatusMessage, generate_error_status, generate_message
 
 Json = Union[dict, list]
 
@@ -22,6 +27,18 @@ class NoUpdates(Exception):
     """Raised when source has no updates"""
 
 
+class PollResult(Enum):
+    """Outcome of single source polling"""
+    CHANGED = 'changed'
+    SAME = 'same'
+    ERROR = 'error'
+    NO_UPDATES = 'no_updates'
+    FAILED = 'failed'
+
+
+OUTAGE_TOPIC = 'UPSTREAM_ERROR'  # upstream outages are reported here by any source
+
+
 class Topics(NamedTuple):
     changes: str
     info: str
@@ -52,6 +69,8 @@ class Source(ABC, metaclass=SourceMeta):
     """Source API posting updates to """
 
     CONFIG_ID: str = NotImplemented
+    # source blocks in `get_update` until update arrives and is polled again without delay
+    event_driven = False
 
     client: Client
     config: SourceConfiguration
@@ -61,74 +80,123 @@ class Source(ABC, metaclass=SourceMeta):
                  ignore_duplicates=True,
                  instance_config: InstanceConfig = DEFAULT_INSTANCE_CONFIG):
         self.client = client
-        self.polling_interval = self.config.timings.polling_interval
-        self.request_timeout = self.config.timings.request_timeout
+        timings = self.config.timings
+        self.polling_interval = timings.polling_interval
+        self.max_polling_interval = timings.max_polling_interval or timings.polling_interval
+        self.backoff_factor = timings.backoff_factor
+        self.max_retry_interval = timings.max_retry_interval or self.max_polling_interval
+        self.jitter = timings.jitter
+        self.request_timeout = timings.request_timeout
+        # seeded with source name, so jitter sequence is reproducible
+        self._random = random.Random(zlib.crc32(type(self).__name__.encode()))
+        self._current_interval: Optional[float] = None
+        self._failures = 0
         self.ignore_duplicates = ignore_duplicates
         self.instance_config = instance_config
         self.heartbeat_interval = 3600
+        self._last_fingerprint: Optional[bytes] = None  # fingerprint of the last published message
+        self._last_published = 0.0  # loop time of the last publishing
 
     @abstractmethod
-    async def get_update(self) -> Optional[dict]:
+    async def get_update(self) -> Optional[Message]:
         """Get source update"""
 
-    async def start(self, stop_event: asyncio.Event):
-        """Start processing updates"""
-        last = None
+    async def poll(self) -> PollResult:
+        """Get single update from source and publish it to matching topic"""
+        name = type(self).__name__
+        try:
+            if self.event_driven:
+                new = await self.get_update()
+            else:
+                new = await asyncio.wait_for(self.get_update(), self.request_timeout)
+        except NoUpdates:
+            return PollResult.NO_UPDATES
+        except asyncio.TimeoutError:
+            LOGGER.warning('Source %s timed out', name)
+            return PollResult.FAILED
+        except UpstreamUnavailable as ex:
+            await self._report_outage(ex)
+            return PollResult.FAILED
+        if _is_zero_status(new):
+            return PollResult.NO_UPDATES
+        if _is_error_report(new):
+            LOGGER.debug('New error data received from source: %s\ndata:\n%s', name, new)
+            await self._publish(self.TOPICS.error, new)
+            return PollResult.ERROR
+        if self.ignore_duplicates and new.fingerprint == self._last_fingerprint:
+            if asyncio.get_event_loop().time() - self._last_published >= self.heartbeat_interval:
+                LOGGER.debug('Duplicate data received from source: %s\ndata:\n%s', name, new)
+                await self._publish(self.TOPICS.info, new)
+            return PollResult.SAME
+        LOGGER.debug('New data received from source: %s\ndata:\n%s', name, new)
+        await self._publish(self.TOPICS.changes, new)
+        return PollResult.CHANGED
+
+    async def _publish(self, topic: str, message: Message):
+        await self.client.publish(topic, encode(message, self.client))
+        self._last_fingerprint = message.fingerprint
+        self._last_published = asyncio.get_event_loop().time()
+
+    async def _report_outage(self, error: UpstreamUnavailable):
+        """Publish single error message per upstream outage, whichever source finds it first"""
+        if not error.breaker.claim_outage_report():
+            return
+        host = error.breaker.host
+        message = generate_message(host, [generate_error_status(host, str(error), Status.NO_DATA)])
+        LOGGER.debug('Upstream outage reported by source: %s\ndata:\n%s', type(self).__name__, message)
+        await self._publish(OUTAGE_TOPIC, message)
+
+    def next_interval(self, result: PollResult) -> float:
+        """Return delay before next polling
+
+        Delay grows while status stays the same and drops to ``polling_interval``
+        as soon as status is changed or error is reported.
+        Consecutive failures are retried with exponential backoff up to ``max_retry_interval``
+        """
+        if result is PollResult.FAILED:
+            self._failures += 1
+            longest = max(self.max_retry_interval, self.polling_interval)
+            return min(self.polling_interval * self.backoff_factor ** (self._failures - 1), longest)
+        if result is not PollResult.NO_UPDATES:
+            self._failures = 0
+        if result is PollResult.SAME and self._current_interval is not None:
+            longest = max(self.max_polling_interval, self.polling_interval)
+            self._current_interval = min(self._current_interval * self.backoff_factor, longest)
+        elif result is not PollResult.NO_UPDATES or self._current_interval is None:
+            self._current_interval = self.polling_interval
+        return self._current_interval
+
+    def _jitter(self) -> float:
+        if not self.jitter:
+            return 0.0
+        return self._random.uniform(0, self.jitter)
+
+    async def start(self, stop_event: asyncio.Event, phase: float = 0.0):
+        """Start processing updates
+
+        First polling is delayed by ``phase`` seconds
+        """
         name = type(self).__name__
-        LOGGER.info('Source %s started', name)
+        LOGGER.info('Source %s started with phase %.1fs', name, phase)
+        if phase:
+            await asyncio.sleep(phase)
         while not stop_event.is_set():
             try:
-                new = await asyncio.wait_for(self.get_update(), self.request_timeout)
-            except (asyncio.TimeoutError, NoUpdates):
-                continue
-            if _is_zero_status(new):
-                continue
-            if _is_error_report(new):
-                json_message = json.dumps(new)
-                LOGGER.debug('New error data received from source: %s\ndata:\n%s', name, new)
-                await self.client.publish(self.TOPICS.error, json_message)
-                last = new
-                LOGGER.debug('Wait for new data for %s', self.polling_interval)
-                await asyncio.sleep(self.polling_interval)
-                continue
-            if self.ignore_duplicates and _same_status(new, last):
-                if _delta_seconds(new, last) >= self.heartbeat_interval:
-                    json_message = json.dumps(new)
-                    LOGGER.debug('Duplicate data received from source: %s\ndata:\n%s', name, new)
-                    await self.client.publish(self.TOPICS.info, json_message)
-                    last = new
-                continue
-            LOGGER.debug('New data received from source: %s\ndata:\n%s', name, new)
-            json_message = json.dumps(new)
-            await self.client.publish(self.TOPICS.changes, json_message)
-            last = new
-            LOGGER.debug('Wait for new data for %s', self.polling_interval)
-            await asyncio.sleep(self.polling_interval)
-
-
-def _delta_seconds(new: dict, last: dict) -> int:
-    if last is None:
-        return 0
-    return new['message_timestamp'] - last['message_timestamp']
-
-
-def _same_status(new: dict, last: dict) -> bool:
-    if last is None:
-        return False
-    if new == last:
-        return True
-    this_statuses = {st['name']: st['status'] for st in new['status_list']}
-    another_statuses = {st['name']: st['status'] for st in last['status_list']}
-    return this_statuses == another_statuses
-
-
-def _is_error_report(msg: dict) -> bool:
-    if 'status_list' in msg:
-        for status in msg['status_list']:
-            if 'error' in status:
-                return True
-    return False
-
-
-def _is_zero_status(msg: dict) -> bool:
-    return 'status_list' in msg and not msg['status_list']
+                result = await self.poll()
+            except Exception:  # pylint:disable=broad-except
+                LOGGER.exception('Polling of %s failed', name)
+                result = PollResult.FAILED
+            interval = self.next_interval(result)
+            if self.event_driven and result is not PollResult.FAILED:
+                continue  # next event is awaited by `get_update` itself
+            interval += self._jitter()
+            LOGGER.debug('Wait for new data for %s', interval)
+            await asyncio.sleep(interval)
+
+
+def _is_error_report(msg: Message) -> bool:
+    return isinstance(msg, StatusMessage) and msg.has_errors
+
+
+def _is_zero_status(msg: Message) -> bool:
+    return isinstance(msg, StatusMessage) and not msg.status_list
@@ -0,0 +1,136 @@
+"""Circuit breaker shared by all clients of the same upstream host"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Dict, Tuple, Type
+
+import aiohttp
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 30
+
+
+class UpstreamError(Exception):
+    """Upstream responded with unexpected status"""
+
+    def __init__(self, host: str, status: int):
+        super().__init__(f'Upstream {host} responded with status {status}')
+        self.status = status
+
+
+def check_status(host: str, status: int):
+    """Raise ``UpstreamError`` for non-2xx response status"""
+    if not 200 <= status < 300:
+        raise UpstreamError(host, status)
+
+
+UPSTREAM_ERRORS: Tuple[Type[BaseException], ...] = (asyncio.TimeoutError, aiohttp.ClientError, OSError,
+                                                    UpstreamError)
+
+
+class BreakerState(Enum):
+    """State of circuit breaker"""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of request to upstream while circuit is open"""
+
+    def __init__(self, breaker: 'CircuitBreaker'):
+        super().__init__(f'Upstream {breaker.host} is unavailable')
+        self.breaker = breaker
+
+
+class CircuitBreaker:
+    """Stop sending requests to the host after ``failure_threshold`` consecutive failures"""
+
+    def __init__(self, host: str, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = 0.0
+        self._state = BreakerState.CLOSED
+        self._trial_running = False
+        self._outage_reported = False
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state is BreakerState.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = BreakerState.HALF_OPEN
+        return self._state
+
+    def _before_request(self) -> bool:
+        """Raise if request is not allowed, return ``True`` for trial request"""
+        state = self.state
+        if state is BreakerState.OPEN or (state is BreakerState.HALF_OPEN and self._trial_running):
+            raise UpstreamUnavailable(self)
+        if state is BreakerState.HALF_OPEN:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        if self._state is not BreakerState.CLOSED:
+            LOGGER.info('Upstream %s is available again, circuit closed', self.host)
+        self._state = BreakerState.CLOSED
+        self.failures = 0
+        self._outage_reported = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._state is BreakerState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self._state is BreakerState.CLOSED:
+                LOGGER.warning('Upstream %s failed %s times in a row, circuit opened', self.host, self.failures)
+            self._state = BreakerState.OPEN
+            self._opened_at = time.monotonic()
+
+    def claim_outage_report(self) -> bool:
+        """Return ``True`` only for the first caller during single outage"""
+        if self._outage_reported:
+            return False
+        self._outage_reported = True
+        return True
+
+    @asynccontextmanager
+    async def guard(self, *failure_types: Type[BaseException]):
+        """Run request through the breaker
+
+        Exceptions of ``UPSTREAM_ERRORS`` and ``failure_types`` are counted as upstream failures,
+        any other exception means upstream responded. Use ``check_status`` to fail on error responses
+        """
+        trial = self._before_request()
+        try:
+            yield
+        except asyncio.CancelledError:
+            raise
+        except UPSTREAM_ERRORS + failure_types:
+            self.record_failure()
+            raise
+        except Exception:
+            self.record_success()
+            raise
+        else:
+            self.record_success()
+        finally:
+            if trial:
+                self._trial_running = False
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    """Return breaker shared by all requests to the ``host``"""
+    breaker = _BREAKERS.get(host)
+    if breaker is None:
+        breaker = CircuitBreaker(host)
+        _BREAKERS[host] = breaker
+    return breaker
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from abc import ABC
 from asyncio import Queue
@@ -10,7 +11,7 @@ from apubsub.client import Client
 from jsonschema import ValidationError, draft7_format_checker, validate
 
 from .awx_api import switch_awx_status
-from .base import Source
+from .base import NoUpdates, Source
 from ..configuration import DEFAULT_INSTANCE_CONFIG, InstanceConfig
 from ..unified_json import convert_timestamp, generate_error, generate_message, generate_status
 
@@ -29,6 +30,8 @@ class HttpListenerSource(Source, ABC):
 
     # pylint: disable=abstract-method
 
+    event_driven = True
+
     def __init__(self, client: Client, instance_config: InstanceConfig=DEFAULT_INSTANCE_CONFIG):
         super().__init__(client,
                          ignore_duplicates=False,
@@ -100,7 +103,10 @@ class AWXWebHookSource(HttpListenerSource):
         return web.Response(text='OK')
 
     async def get_update(self):
-        update = await self.updates.get()
+        try:
+            update = await asyncio.wait_for(self.updates.get(), self.polling_interval)
+        except asyncio.TimeoutError:
+            raise NoUpdates
         try:
             status = generate_status(
                 name=update['name'],
@@ -1,22 +1,20 @@
 """Influx sources"""
 import asyncio
-import json
 import logging
-import re
-from collections import deque
+import math
+import time
 from dataclasses import dataclass
-from datetime import datetime
-from statistics import StatisticsError, mean
-from typing import Dict, List, NamedTuple
-
-import aiohttp
-from aiohttp_socks import ProxyConnector
-from influxdb import InfluxDBClient
-from influxdb.exceptions import InfluxDBClientError, InfluxDBServerError
-from influxdb.resultset import ResultSet
+from datetime import datetime, timezone
+from functools import lru_cache
+from operator import itemgetter
+from statistics import StatisticsError
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Set, Tuple
+
 from ocomone import Resources
 
 from .base import Source, SourceMeta
+from .influx_client import get_influx_client
+from .windows import WindowedStore, create_window_store
 from ..unified_json import (Status, UNIFIED_TIME_PATTERN,
                             generate_error_status, generate_message, generate_status)
 
@@ -24,110 +22,19 @@ LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
 _CONFIGS = Resources(__file__)
 
+_CACHE_TTL_PART = 0.5  # part of polling interval query results are shared between sources for
+_NS_PER_SECOND = 10 ** 9
+_EPOCH_UNITS = {  # units per second for supported `epoch` precisions
+    'ns': _NS_PER_SECOND,
+    'u': 10 ** 6,
+    'ms': 10 ** 3,
+    's': 1,
+}
 
-class AsyncInfluxClient(InfluxDBClient):  # pragma: no cover
-    """Influx client using aiohttp instead of requests"""
-
-    # pylint: disable=too-many-arguments
-
-    def __init__(self, *args, proxy='', **kwargs):
-        self.proxy: str = proxy
-        super().__init__(*args, **kwargs)
-
-    # pylint:disable=invalid-overridden-method
-    async def query(self,
-                    query,
-                    params=None,
-                    bind_params=None,
-                    epoch=None,
-                    expected_response_code=200,
-                    database=None,
-                    raise_errors=True,
-                    chunked=False,
-                    chunk_size=0,
-                    method='GET'):
-        if params is None:
-            params = {}
-
-        if bind_params is not None:
-            params_dict = json.loads(params.get('params', '{}'))
-            params_dict.update(bind_params)
-            params['params'] = json.dumps(params_dict)
-
-        params['q'] = query
-        params['db'] = database or self._database
-
-        if epoch is not None:
-            params['epoch'] = epoch
-
-        if chunked:
-            params['chunked'] = 'true'
-            if chunk_size > 0:
-                params['chunk_size'] = chunk_size
-
-        if query.lower().startswith('select ') and ' into ' in query.lower():
-            method = 'POST'
-
-        # noinspection PyTypeChecker
-        data = await self.request(
-            url='query',
-            method=method,
-            params=params,
-            data=None,
-            expected_response_code=expected_response_code
-        )
-
-        results = [
-            ResultSet(result, raise_errors=raise_errors)
-            for result
-            in data.get('results', [])
-        ]
-
-        if len(results) == 1:
-            return results[0]
-
-        return results
 
-    # pylint:disable=invalid-overridden-method
-    async def request(self, url, method='GET', params=None, data=None,
-                      expected_response_code=200, headers=None):
-        url = f'{self._baseurl}/{url}'
-
-        if headers is None:
-            headers = self._headers
-
-        if params is None:
-            params = {}
-
-        if isinstance(data, (dict, list)):
-            data = json.dumps(data)
-
-        kwargs = dict(
-            method=method,
-            url=url,
-            params=params,
-            data=data,
-            headers=headers,
-            verify_ssl=self._verify_ssl,
-            timeout=self._timeout,
-        )
-        if self._username is not None:
-            kwargs.update(auth=aiohttp.BasicAuth(self._username, self._password or ''))
-
-        if self.proxy:
-            connector = ProxyConnector.from_url(self.proxy)
-        else:
-            connector = None
-
-        async with aiohttp.ClientSession(connector=connector, headers=self._session.headers) as session:
-            async with session.request(**kwargs) as response:
-                data = await response.json()
-        # if there's not an error, there must have been a successful response
-        if 500 <= response.status < 600:
-            raise InfluxDBServerError(data)
-        if response.status == expected_response_code:
-            return data
-        raise InfluxDBClientError(data, response.status)
+@lru_cache(maxsize=None)
+def _render_query(template: str, params: Tuple[Tuple[str, Any], ...]) -> str:
+    return template.format(**dict(params))
 
 
 @dataclass(frozen=True)
@@ -137,6 +44,20 @@ class Metric:
     metric_id: str
     timeout: int = 300
     query: str = ''
+    incremental_query: str = ''  # query of points since `{since}` time, used after the first `query`
+
+    def render(self, **params) -> str:
+        """Render query template, result is memoised per parameters
+
+        ``entity`` defaults to ``metric_id``
+        """
+        params.setdefault('entity', self.metric_id)
+        return _render_query(self.query, tuple(sorted(params.items())))
+
+    def render_incremental(self, since: str, **params) -> str:
+        """Render incremental query template for points since ``since`` time expression"""
+        params.setdefault('entity', self.metric_id)
+        return self.incremental_query.format(since=since, **params)
 
 
 class InfluxParams(NamedTuple):
@@ -146,6 +67,8 @@ class InfluxParams(NamedTuple):
     username: str
     database: str
     metrics: List[Metric]
+    epoch: Optional[str] = None
+    chunk_size: int = 0
 
 
 class InfluxSourceMeta(SourceMeta):
@@ -156,8 +79,29 @@ class InfluxSourceMeta(SourceMeta):
         params = cls.config.params
         metrics = params['metrics']
         metrics = [Metric(**met) for met in metrics]
+        epoch = params.get('epoch')
+        if epoch is not None and epoch not in _EPOCH_UNITS:
+            raise ValueError(f'Unsupported epoch precision `{epoch}` for {cls.CONFIG_ID}')
         cls._params = InfluxParams(metrics=metrics, host=params['host'], port=params['port'],
-                                   username=params['username'], database=params['database'])
+                                   username=params['username'], database=params['database'],
+                                   epoch=epoch, chunk_size=params.get('chunk_size', 0))
+        cls._queries = _compile_queries(cls, metrics)
+
+
+def _compile_queries(cls, metrics: List[Metric]) -> Dict[Metric, str]:
+    """Render all queries not depending on runtime parameters"""
+    queries = {}
+    for metric in metrics:
+        if metric.incremental_query and '{since}' not in metric.incremental_query:
+            raise ValueError(f'Incremental query of metric {metric.name} in {cls.CONFIG_ID} has no `{{since}}`')
+        try:
+            query = metric.render(**cls._template_params(metric))
+        except KeyError:  # query has dynamic parameters, it's rendered on use
+            continue
+        if not query.upper().startswith('SELECT ') or '{' in query or '}' in query:
+            raise ValueError(f'Invalid query `{query}` of metric {metric.name} in {cls.CONFIG_ID}')
+        queries[metric] = query
+    return queries
 
 
 def _get_error_template(mes_file):
@@ -171,8 +115,8 @@ class InfluxSource(Source, metaclass=InfluxSourceMeta):
 
     CONFIG_ID = 'influxdb'
     _params: InfluxParams
+    _queries: Dict[Metric, str]
     _error_template: str = None
-    _influx_client = None
 
     @property
     def _metrics(self):
@@ -180,20 +124,104 @@ class InfluxSource(Source, metaclass=InfluxSourceMeta):
 
     @property
     def influx_client(self):
-        """Return new instance of influx client"""
-        if self._influx_client is None:
-            params = self._params
-            self._influx_client = AsyncInfluxClient(
-                host=params.host,
-                port=params.port,
-                username=params.username,
-                password=self.instance_config.influx_password,
-                database=params.database,
-                ssl=True,
-                verify_ssl=True,
-                proxy=self.instance_config.proxy,
-            )
-        return self._influx_client
+        """Return influx client shared between sources using the same database"""
+        params = self._params
+        return get_influx_client(
+            host=params.host,
+            port=params.port,
+            database=params.database,
+            username=params.username,
+            password=self.instance_config.influx_password,
+            proxy=self.instance_config.proxy,
+            ssl=True,
+            verify_ssl=True,
+            timeout=self.request_timeout,
+            chunk_size=params.chunk_size,
+        )
+
+    @classmethod
+    def _template_params(cls, metric: Metric) -> dict:
+        """Parameters used for rendering metric query template"""
+        return {'entity': metric.metric_id}
+
+    def _metric_query(self, metric: Metric, **params) -> str:
+        """Return rendered query of the metric
+
+        Queries without additional parameters are rendered once on class creation
+        """
+        if not params:
+            return self._queries[metric]
+        return metric.render(**{**self._template_params(metric), **params})
+
+    async def _query(self, query: str):
+        """Run query batched with other queries of the same polling cycle
+
+        Result of identical query sent by any source during last half of polling interval is reused
+        """
+        ttl = self.polling_interval * _CACHE_TTL_PART
+        return await self.influx_client.query_cached(query, ttl, epoch=self._params.epoch)
+
+    async def _query_window(self, metric: Metric, store: WindowedStore, series_key: Callable[[dict], Optional[Hashable]],
+                            backfill: bool = False) -> Set[Hashable]:
+        """Query new points of metric series into ``store``, return keys of series found in query result
+
+        Series are stored by key returned by ``series_key`` for the series tags, ``None`` key skips series.
+        Regular query of the metric is used while store is empty, so last points of all series are known,
+        or, if ``backfill`` is set, incremental query of the whole window.
+        Then only points since the last consumed one are queried using metric incremental query
+        """
+        if not metric.incremental_query or (not len(store) and not backfill):
+            query = self._metric_query(metric)
+        else:
+            cursor = store.cursor()
+            since = f'now() - {int(store.span)}s' if cursor is None else self._time_literal(cursor)
+            query = metric.render_incremental(since, **self._template_params(metric))
+        result = await self._query(query)
+        keys = set()
+        for series in result.series:
+            try:
+                key = series_key(series['tags'])
+                points = sorted(((self._seconds(row[0]), row) for row in series['values']), key=itemgetter(0))
+            except (KeyError, IndexError):
+                continue
+            if key is None:
+                continue
+            keys.add(key)
+            for seconds, (timestamp, value, *_) in points:
+                if value is not None:
+                    store.add(key, seconds, value, timestamp)
+        store.trim(time.time())
+        return keys
+
+    def _seconds(self, timestamp) -> float:
+        """Convert Influx timestamp to POSIX time"""
+        epoch = self._params.epoch
+        if epoch is None:
+            return _convert_time(timestamp).replace(tzinfo=timezone.utc).timestamp()
+        return timestamp / _EPOCH_UNITS[epoch]
+
+    def _time_literal(self, timestamp) -> str:
+        """Return InfluxQL time literal of Influx timestamp"""
+        epoch = self._params.epoch
+        if epoch is None:
+            return f"'{timestamp}'"
+        return f'{timestamp}{epoch}'
+
+    def _is_stale(self, last_time, timeout) -> bool:
+        """Check if Influx timestamp is older than ``timeout`` seconds"""
+        epoch = self._params.epoch
+        if epoch is None:
+            return datetime.utcnow().timestamp() - _convert_time(last_time).timestamp() > timeout
+        units = _EPOCH_UNITS[epoch]
+        return time.time_ns() // (_NS_PER_SECOND // units) - last_time > timeout * units
+
+    def _format_time(self, last_time) -> str:
+        """Format Influx timestamp using unified time pattern"""
+        epoch = self._params.epoch
+        if epoch is None:
+            return _convert_time(last_time).strftime(UNIFIED_TIME_PATTERN)
+        last_datetime = datetime.fromtimestamp(last_time / _EPOCH_UNITS[epoch], timezone.utc)
+        return last_datetime.strftime(UNIFIED_TIME_PATTERN)
 
     async def get_update(self) -> dict:
         results = await asyncio.gather(*[
@@ -202,18 +230,16 @@ class InfluxSource(Source, metaclass=InfluxSourceMeta):
         return generate_message(self.CONFIG_ID, results)
 
     async def _get_status(self, metric):
-        query = metric.query.format(entity=metric.metric_id)
-        last_record = await self.influx_client.query(query)
+        query = self._metric_query(metric)
+        last_record = await self._query(query)
         try:
             last_time = last_record.raw['series'][0]['values'][0][0]
         except KeyError:
             return generate_status(metric.name, Status.NO_DATA, None)
-        now = datetime.utcnow().timestamp()
-        last_time_ms = _convert_time(last_time)
-        status = Status.FAIL
-        if now - last_time_ms.timestamp() < metric.timeout:
-            status = Status.OK
-        return generate_status(metric.name, status, last_time_ms.strftime(UNIFIED_TIME_PATTERN))
+        status = Status.OK
+        if self._is_stale(last_time, metric.timeout):
+            status = Status.FAIL
+        return generate_status(metric.name, status, self._format_time(last_time))
 
 
 class _InfluxTimingAuxMetrics(NamedTuple):
@@ -233,42 +259,43 @@ class InfluxSourceLBTiming(InfluxSource):
     """InfluxSourceLBTiming client"""
 
     CONFIG_ID = 'influxdb_lb_timing'
-    _host_timings: Dict[str, deque] = {}
-    DEQUE_SIZE = 5
+    WINDOW = 300  # seconds of response timings compared with threshold
 
     threshold = 80
     _error_template = _get_error_template('error_lb_timing.txt')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._host_timings = create_window_store(self.WINDOW)
+
     async def get_update(self) -> dict:
         main_metric = self._metrics[0]
-        host_statuses = await self._get_status(main_metric)
-        results = []
-        for host, status in host_statuses.items():
-            if status[0] != Status.OK:
-                results.append(
-                    generate_status(host,
-                                    status[0],
-                                    status[1].strftime(UNIFIED_TIME_PATTERN)))
-            else:
-                if min(self._host_timings[host]) > self.threshold:
-                    state = await self._get_auxiliary_metrics()  # get overall host state
-                    results.append(
-                        generate_error_status(host,
-                                              self._get_error_message(host, state),
-                                              Status.ALERTING))
+        await self._query_window(main_metric, self._host_timings, itemgetter('server'))
+        check = self._host_timings.check(time.time(), main_metric.timeout, all_above=self.threshold)
+        results = [
+            generate_status(host, Status.FAIL, self._format_time(self._host_timings.last_seen(host)))
+            for host in check.stale
+        ]
+        if check.tripped:
+            state = await self._get_auxiliary_metrics()  # get overall host state
+            results.extend(
+                generate_error_status(host, self._get_error_message(host, state), Status.ALERTING)
+                for host in check.tripped
+            )
         return generate_message(self.CONFIG_ID, results)
 
     async def _get_auxiliary_metrics(self) -> Dict[str, _InfluxTimingAuxMetrics]:
         """Return hosts with results of predefined diagnostic queries for each host"""
-        list_queries = [met.query.format(entity=met.metric_id) for met in self._metrics[1:]]
+        list_queries = [self._metric_query(met) for met in self._metrics[1:]]
         results = await asyncio.gather(*[
-            self.influx_client.query(query) for query in list_queries
+            self._query(query) for query in list_queries
         ])
+        hosts = self._host_timings.keys()
         host_results = {}
-        for host in self._host_timings:
+        for host in hosts:
             host_results[host] = []
         for result in results:
-            host_series = zip(self._host_timings.keys(), result.raw['series'])
+            host_series = zip(hosts, result.raw['series'])
             for host, series in host_series:
                 host_results[host].append(series['values'][0][1])
         for host in host_results:
@@ -278,7 +305,7 @@ class InfluxSourceLBTiming(InfluxSource):
 
     def _get_error_message(self, host, aux_metrics: Dict[str, _InfluxTimingAuxMetrics]):
         try:
-            current_response_time = f'{round(mean(self._host_timings[host]))}'
+            current_response_time = f'{round(self._host_timings.mean(host))}'
         except StatisticsError:
             current_response_time = 'No data'
         host_state = aux_metrics[host]
@@ -292,30 +319,6 @@ class InfluxSourceLBTiming(InfluxSource):
             network_bytes_send=round(host_state.network_bytes_send / 1000, 2)
         )
 
-    async def _get_status(self, metric):
-        """Generate status, line per server"""
-        query = metric.query.format(entity=metric.metric_id)
-        last_record = await self.influx_client.query(query)
-        if not self._host_timings:
-            for series in last_record.raw['series']:
-                host = series['tags']['server']
-                self._host_timings[host] = deque([], self.DEQUE_SIZE)
-        statuses = {}
-        for series in last_record.raw['series']:
-            try:
-                host = series['tags']['server']
-                last_time, response_time, *_ = series['values'][0]
-            except(KeyError, IndexError):
-                continue
-            last_time_ms = _convert_time(last_time)
-            self._host_timings[host].append(response_time)
-            now = datetime.utcnow().timestamp()
-            status = Status.OK
-            if now - last_time_ms.timestamp() > metric.timeout:
-                status = Status.FAIL
-            statuses[host] = (status, last_time_ms)
-        return statuses
-
 
 class InfluxSourceLBDOWN(InfluxSource):
     """InfluxSourceLBDOWN client"""
@@ -326,13 +329,13 @@ class InfluxSourceLBDOWN(InfluxSource):
 
     async def get_update(self) -> dict:
         metric = self._metrics[0]
-        status, last_time_ms, error_count = await self._get_status(metric)
+        status, last_time, error_count = await self._get_status(metric)
         results = []
         if status != Status.OK:
             results.append(
                 generate_status(metric.name,
                                 status,
-                                last_time_ms.strftime(UNIFIED_TIME_PATTERN)))
+                                self._format_time(last_time)))
         else:
             if error_count >= self.threshold:
                 results.append(
@@ -342,18 +345,16 @@ class InfluxSourceLBDOWN(InfluxSource):
         return generate_message(self.CONFIG_ID, results)
 
     async def _get_status(self, metric):
-        query = metric.query.format(entity=metric.metric_id)
-        last_record = await self.influx_client.query(query)
+        query = self._metric_query(metric)
+        last_record = await self._query(query)
         status = Status.OK
         try:
             last_time, count, *_ = last_record.raw['series'][0]['values'][0]
         except (KeyError, IndexError) as ex:
             raise InfluxQueryResultsException from ex
-        now = datetime.utcnow().timestamp()
-        last_time_ms = _convert_time(last_time)
-        if now - last_time_ms.timestamp() > metric.timeout:
+        if self._is_stale(last_time, metric.timeout):
             status = Status.FAIL
-        return status, last_time_ms, count
+        return status, last_time, count
 
     def _get_error_message(self):
         return self._error_template
@@ -364,62 +365,39 @@ class InfluxSourceLBDOWNFailCount(InfluxSource):
 
     CONFIG_ID = 'influxdb_lb_down_fail_requests'
     _error_template = _get_error_template('error_lb_down_fail_requests.txt')
-    _fail_count: deque = None
     threshold = 5
-    DEQUE_SIZE = 5
+    WINDOW = 300  # seconds of per minute fail counts compared with threshold
+    WINDOW_SIZE = 8
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._fail_count = deque([0] * self.DEQUE_SIZE, self.DEQUE_SIZE)
+        self._fail_count = create_window_store(self.WINDOW, self.WINDOW_SIZE)
 
     async def get_update(self) -> dict:
         metric = self._metrics[0]
-        host, status, last_time_ms = await self._get_status(self._metrics[0])
+        # window is filled on the first poll, so single failing minute is never checked alone
+        await self._query_window(metric, self._fail_count, _host_tag, backfill=True)
+        # if there are errors every minute for 5 mins
+        check = self._fail_count.check(time.time(), metric.timeout, all_above=self.threshold)
         results = []
-        if status != Status.OK:
-            results.append(
-                generate_status(metric.name,
-                                status,
-                                last_time_ms.strftime(UNIFIED_TIME_PATTERN)))
-        else:
-            if min(self._fail_count) > self.threshold:  # if there are at least 1 error per minute for 5 mins
-                results.append(
-                    generate_error_status(host,
-                                          self._get_error_message(),
-                                          Status.ALERTING))
+        if check.stale:  # single status of the metric, as fail counts of all hosts are one metric
+            last_seen = max((self._fail_count.last_seen(host) for host in check.stale), key=self._seconds)
+            results.append(generate_status(metric.name, Status.FAIL, self._format_time(last_seen)))
+        results.extend(
+            generate_error_status(host, self._get_error_message(), Status.ALERTING)
+            for host in check.tripped
+        )
         return generate_message(self.CONFIG_ID, results)
 
-    async def _get_status(self, metric):
-        query = metric.query.format(entity=metric.metric_id)
-        last_record = await self.influx_client.query(query)
-        try:
-            series = last_record.raw['series'][0]
-            host = series['tags']['host']
-            last_time, fail_count, *_ = series['values'][0]
-            self._fail_count.append(fail_count)
-        except (KeyError, IndexError) as ex:
-            raise InfluxQueryResultsException from ex
-        now = datetime.utcnow().timestamp()
-        last_time_ms = _convert_time(last_time)
-        status = Status.OK
-        if now - last_time_ms.timestamp() > metric.timeout:
-            status = Status.FAIL
-        return host, status, last_time_ms
-
     def _get_error_message(self):
         return self._error_template.format()
 
 
-def _get_disk_info(target_value, last_time, timeout) -> List:
-    disk_info = [target_value]
-    now = datetime.utcnow().timestamp()
-    last_time_ms = _convert_time(last_time)
-    disk_info.append(last_time_ms)
-    status = Status.OK
-    if now - last_time_ms.timestamp() > timeout:
-        status = Status.FAIL
-    disk_info.append(status)
-    return disk_info
+def _host_tag(tags: dict) -> str:
+    try:
+        return tags['host']
+    except KeyError as ex:
+        raise InfluxQueryResultsException from ex
 
 
 class InfluxSourceDiskStateRead(InfluxSource):
@@ -437,33 +415,47 @@ class InfluxSourceDiskStateRead(InfluxSource):
     )
     entity = 'diskio'
     column = 'reads'
+    additional_condition = ''
 
     scenario_names = {
         ('sda',): 'SCSI_HDD_TEST',
         ('vdb', 'vdc', 'vdd',): 'HDD_TEST',
     }
 
+    @classmethod
+    def _template_params(cls, metric: Metric) -> dict:
+        if metric == cls._params.metrics[0]:
+            return {'entity': cls.entity, 'column': cls.column, 'additional_condition': cls.additional_condition}
+        return super()._template_params(metric)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._disks = create_window_store(math.inf, size=1)  # last value of every (host, device)
+
     async def get_update(self):
         main_metric = self._metrics[0]
-        disk_statuses = await self._get_status(main_metric)
-        results = []
-        aux_metric = await self.get_auxiliary_metrics()
-        for host in disk_statuses.keys():
-            for device in disk_statuses[host].keys():
-                if disk_statuses[host][device][2] != Status.OK:
-                    results.append(
-                        generate_status(host,
-                                        disk_statuses[host][device][2],
-                                        disk_statuses[host][device][1].strftime(UNIFIED_TIME_PATTERN)))
-                else:
-                    if disk_statuses[host][device][0] <= 0:
-                        results.append(
-                            generate_error_status(host,
-                                                  self._get_error_message(host, device, aux_metric),
-                                                  Status.ALERTING))
-
+        reported, aux_metric = await asyncio.gather(
+            self._query_window(main_metric, self._disks, self._series_key),
+            self.get_auxiliary_metrics(),
+        )
+        self._disks.retain(reported)  # devices which stopped reporting are not checked
+        check = self._disks.check(time.time(), main_metric.timeout, all_at_most=0)
+        results = [
+            generate_status(host, Status.FAIL, self._format_time(self._disks.last_seen((host, device))))
+            for host, device in check.stale
+        ]
+        results.extend(
+            generate_error_status(host, self._get_error_message(host, device, aux_metric), Status.ALERTING)
+            for host, device in check.tripped
+        )
         return generate_message(self.__class__.__name__, results)
 
+    def _series_key(self, tags: dict) -> Optional[Tuple[str, str]]:
+        host, device = tags['host'], tags['name']
+        if device in self.devices and host in self.hosts:
+            return host, device
+        return None
+
     def _get_error_message(self, host, device, aux_metric):
         text_message = self.warning_template.format(device=device)
         try:
@@ -477,9 +469,9 @@ class InfluxSourceDiskStateRead(InfluxSource):
         return str_template
 
     async def get_auxiliary_metrics(self):
-        list_queries = [met.query.format(entity=met.metric_id) for met in self._metrics[1:]]
+        list_queries = [self._metric_query(met) for met in self._metrics[1:]]
         results = await asyncio.gather(*[
-            self.influx_client.query(query) for query in list_queries
+            self._query(query) for query in list_queries
         ])
         aux_metric = {host: [] for host in self.hosts}
         for result in results:
@@ -492,24 +484,6 @@ class InfluxSourceDiskStateRead(InfluxSource):
                     continue
         return aux_metric
 
-    async def _get_status(self, metric):
-        query = metric.query.format(entity=self.entity,
-                                    column=self.column,
-                                    additional_condition='')
-        last_record = await self.influx_client.query(query)
-        disk_statuses = {host: {} for host in self.hosts}
-        for series in last_record.raw['series']:
-            try:
-                host = series['tags']['host']
-                device = series['tags']['name']
-                target_value = series['values'][0][1]
-                last_time = series['values'][0][0]
-            except (IndexError, KeyError):
-                continue
-            if device in self.devices and host in self.hosts:
-                disk_statuses[host][device] = _get_disk_info(target_value, last_time, metric.timeout)
-        return disk_statuses
-
 
 class InfluxSourceDiskStateWrite(InfluxSourceDiskStateRead):
     """InfluxSourceDiskStateWrite client"""
@@ -530,25 +504,11 @@ class InfluxSourceDiskStateReadSFS(InfluxSourceDiskStateRead):
     }
     additional_condition = 'AND type=~/read/'
 
-    async def _get_status(self, metric):
-        query = metric.query.format(
-            entity=self.entity,
-            column=self.column,
-            additional_condition=self.additional_condition
-        )
-        last_record = await self.influx_client.query(query)
-        disk_statuses = {host: {} for host in self.hosts}
-        for series in last_record.raw['series']:
-            try:
-                host = series['tags']['host']
-                target_value = series['values'][0][1]
-                device = self.devices[0]
-                last_time = series['values'][0][0]
-            except (IndexError, KeyError):
-                continue
-            if host in self.hosts:
-                disk_statuses[host][device] = _get_disk_info(target_value, last_time, metric.timeout)
-        return disk_statuses
+    def _series_key(self, tags: dict) -> Optional[Tuple[str, str]]:
+        host = tags['host']
+        if host in self.hosts:
+            return host, self.devices[0]
+        return None
 
 
 class InfluxSourceDiskStateWriteSFS(InfluxSourceDiskStateReadSFS):
@@ -573,13 +533,13 @@ class InfluxSourceAutoscaling(InfluxSource):
 
     async def get_update(self) -> dict:
         main_metric = self._metrics[0]
-        response_time, last_time_ms, status = await self._get_status(main_metric)
+        response_time, last_time, status = await self._get_status(main_metric)
         results = []
         if status != status.OK:
             results.append(
                 generate_status(main_metric.name,
                                 status,
-                                last_time_ms.strftime(UNIFIED_TIME_PATTERN)))
+                                self._format_time(last_time)))
         else:
             if response_time is not None and response_time > self.threshold:
                 cpu_utilization = await self._get_auxiliary_metrics(self._metrics[1])
@@ -590,22 +550,20 @@ class InfluxSourceAutoscaling(InfluxSource):
         return generate_message(self.CONFIG_ID, results)
 
     async def _get_status(self, metric):
-        query = metric.query.format(entity=metric.metric_id)
-        last_record = await self.influx_client.query(query)
+        query = self._metric_query(metric)
+        last_record = await self._query(query)
         try:
             last_time, response_time = last_record.raw['series'][0]['values'][0]
         except(IndexError, KeyError) as ex:
             raise InfluxQueryResultsException from ex
         status = Status.OK
-        now = datetime.utcnow().timestamp()
-        last_time_ms = _convert_time(last_time)
-        if now - last_time_ms.timestamp() > metric.timeout:
+        if self._is_stale(last_time, metric.timeout):
             status = Status.FAIL
-        return response_time, last_time_ms, status
+        return response_time, last_time, status
 
     async def _get_auxiliary_metrics(self, metric):
-        query = metric.query.format(entity=metric.metric_id)
-        last_record = await self.influx_client.query(query)
+        query = self._metric_query(metric)
+        last_record = await self._query(query)
         try:
             cpu_utilization = round(last_record.raw['series'][0]['values'][0][1], 2)
         except(IndexError, KeyError):
@@ -639,13 +597,13 @@ class InfluxSourceRDSTest(InfluxSource):
 
     async def get_update(self) -> dict:
         main_metric = self._metrics[0]
-        previous_value, last_time_ms, status = await self._get_status(main_metric)
+        previous_value, last_time, status = await self._get_status(main_metric)
         results = []
         if status != status.OK:
             results.append(
                 generate_status(main_metric.name,
                                 status,
-                                last_time_ms.strftime(UNIFIED_TIME_PATTERN)))
+                                self._format_time(last_time)))
         else:
             if previous_value < self.threshold:
                 aux_metrics = await self._get_auxiliary_metrics()
@@ -658,12 +616,12 @@ class InfluxSourceRDSTest(InfluxSource):
 
     async def _get_auxiliary_metrics(self):
         aux_metric = self._metrics[1]
-        aux_metrics = {'rps': await self._get_rps(aux_metric), 'qps': await self._get_qps(aux_metric)}
-        return aux_metrics
+        rps, qps = await asyncio.gather(self._get_rps(aux_metric), self._get_qps(aux_metric))
+        return {'rps': rps, 'qps': qps}
 
     async def _get_qps(self, metric):
-        query = metric.query.format(entity=metric.metric_id, column='xact_commit')
-        last_record = await self.influx_client.query(query)
+        query = self._metric_query(metric, column='xact_commit')
+        last_record = await self._query(query)
         try:
             qps = round(last_record.raw['series'][0]['values'][0][1], 2)
         except(IndexError, KeyError) as ex:
@@ -671,10 +629,11 @@ class InfluxSourceRDSTest(InfluxSource):
         return qps
 
     async def _get_rps(self, metric):
+        records = await asyncio.gather(*[
+            self._query(self._metric_query(metric, column=row)) for row in self.rows
+        ])
         row_values = {}
-        for row in self.rows:
-            query = metric.query.format(entity=metric.metric_id, column=row)
-            last_record = await self.influx_client.query(query)
+        for row, last_record in zip(self.rows, records):
             try:
                 row_values[row] = round(last_record.raw['series'][0]['values'][0][1], 2)
             except(IndexError, KeyError) as ex:
@@ -682,19 +641,17 @@ class InfluxSourceRDSTest(InfluxSource):
         return row_values
 
     async def _get_status(self, metric):
-        query = metric.query.format(entity=metric.metric_id)
-        last_record = await self.influx_client.query(query)
+        query = self._metric_query(metric)
+        last_record = await self._query(query)
         try:
             last_time = last_record.raw['series'][0]['values'][0][0]
             next_last_value = last_record.raw['series'][0]['values'][1][1]
         except(IndexError, KeyError) as ex:
             raise InfluxQueryResultsException from ex
         status = Status.OK
-        now = datetime.utcnow().timestamp()
-        last_time_ms = _convert_time(last_time)
-        if now - last_time_ms.timestamp() > metric.timeout:
+        if self._is_stale(last_time, metric.timeout):
             status = Status.FAIL
-        return next_last_value, last_time_ms, status
+        return next_last_value, last_time, status
 
     def _get_error_message(self, rows_info, qps):
         return self._error_template.format(rps=rows_info, qps=qps)
@@ -708,21 +665,30 @@ class InfluxQueryResultsException(Exception):
     """Error during Influx query results parsing"""
 
 
-_RE_TIME_GROUPS = re.compile(r'(.+)\.(\d+)(Z)')
-_RE_TIME_GROUPS_WITHOUT_MS = re.compile(r'(.+)(Z)')
 TIME_PATTERN = '%Y-%m-%dT%H:%M:%S.%fZ'
-
-
-def _convert_time(timestamp) -> datetime:
-    match_ts = _RE_TIME_GROUPS.match(timestamp)
-    if match_ts is None:
-        match_ts = _RE_TIME_GROUPS_WITHOUT_MS.match(timestamp)
-        if match_ts is None:
-            raise InfluxTimestampParseException
-        timestamp, timezone = match_ts.groups()
-        dtime = datetime.strptime(f'{timestamp}.123456{timezone}', TIME_PATTERN)
-        return dtime
-    timestamp, nsec, timezone, *_ = match_ts.groups()
-    msec = nsec[:6]
-    dtime = datetime.strptime(f'{timestamp}.{msec}{timezone}', TIME_PATTERN)
-    return dtime
+_NO_FRACTION_MICROSECONDS = 123456  # value used for timestamps without fractional seconds
+
+
+@lru_cache(maxsize=1024)
+def _convert_time(timestamp: str) -> datetime:
+    """Convert Influx RFC3339 UTC timestamp (up to nanosecond precision) to naive datetime
+
+    Fraction is truncated to microseconds. Conversion results are cached, as
+    the same timestamp is usually shared by many series of the same query
+    """
+    try:
+        if timestamp[4] != '-' or timestamp[7] != '-' or timestamp[10] != 'T' \
+                or timestamp[13] != ':' or timestamp[16] != ':' or timestamp[-1] != 'Z':
+            raise InfluxTimestampParseException(timestamp)
+        if len(timestamp) == 20:
+            microsecond = _NO_FRACTION_MICROSECONDS
+        else:
+            fraction = timestamp[20:-1]
+            if timestamp[19] != '.' or not fraction.isdigit():
+                raise InfluxTimestampParseException(timestamp)
+            microsecond = int(fraction[:6].ljust(6, '0'))
+        return datetime(int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10]),
+                        int(timestamp[11:13]), int(timestamp[14:16]), int(timestamp[17:19]),
+                        microsecond)
+    except (IndexError, TypeError, ValueError) as ex:
+        raise InfluxTimestampParseException(timestamp) from ex
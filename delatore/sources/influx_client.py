@@ -0,0 +1,497 @@
+"""Asynchronous InfluxDB client"""
+import asyncio
+import functools
+import json
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp_socks import ProxyConnector
+from influxdb import InfluxDBClient
+from influxdb.exceptions import InfluxDBClientError, InfluxDBServerError
+from influxdb.resultset import ResultSet
+
+from .circuit_breaker import CircuitBreaker, get_circuit_breaker
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+POOL_SIZE = 10
+KEEPALIVE_TIMEOUT = 75
+DNS_CACHE_TTL = 300
+MAX_CONCURRENCY = 10
+MAX_BATCH_SIZE = 20
+BATCH_WINDOW = 0.01
+CACHE_SIZE = 256
+
+
+@dataclass
+class InfluxClientStats:
+    """Request statistics of single client"""
+    requests: int = 0
+    failures: int = 0
+    in_flight: int = 0
+    total_time: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    @property
+    def mean_time(self) -> float:
+        """Mean time of request in seconds"""
+        if not self.requests:
+            return 0.0
+        return self.total_time / self.requests
+
+
+class InfluxResult:
+    """Lightweight result of single statement
+
+    Unlike ``ResultSet`` it only keeps raw statement JSON and builds nothing on top of it
+    """
+
+    __slots__ = ('raw',)
+
+    def __init__(self, raw: dict, raise_errors=True):
+        if raise_errors and 'error' in raw:
+            raise InfluxDBClientError(raw['error'])
+        self.raw = raw
+
+    @property
+    def series(self) -> List[dict]:
+        """List of result series"""
+        return self.raw.get('series', [])
+
+    def __repr__(self):
+        return f'InfluxResult({self.raw!r})'
+
+
+def _series_key(statement_id: int, series: dict):
+    tags = series.get('tags') or {}
+    return statement_id, series.get('name'), tuple(sorted(tags.items()))
+
+
+async def merge_chunks(chunks: AsyncIterator[dict]) -> Dict[int, dict]:
+    """Merge results of chunked response into single result per statement
+
+    Chunks are folded in as they arrive, partial series with the same name and tags are joined together
+    """
+    statements: Dict[int, dict] = {}
+    series_index = {}
+    async for chunk in chunks:
+        for index, result in enumerate(chunk.get('results', [])):
+            statement_id = result.get('statement_id', index)
+            merged = statements.setdefault(statement_id, {'statement_id': statement_id})
+            if 'error' in result:
+                merged['error'] = result['error']
+            for series in result.get('series', []):
+                key = _series_key(statement_id, series)
+                existing = series_index.get(key)
+                if existing is None:
+                    series = dict(series)
+                    series.pop('partial', None)
+                    series_index[key] = series
+                    merged.setdefault('series', []).append(series)
+                else:
+                    existing.setdefault('values', []).extend(series.get('values', []))
+    return statements
+
+
+def _strip_query(query: str) -> str:
+    return query.strip().rstrip(';').rstrip()
+
+
+def _is_read_query(query: str) -> bool:
+    lower = query.lower()
+    return lower.startswith(('select ', 'show ')) and ' into ' not in lower
+
+
+class _PendingBatch:
+    """Queries waiting to be sent within single batch window, identical queries are sent once"""
+
+    def __init__(self):
+        self.queries: Dict[Tuple[str, Optional[str]], Dict[str, List[asyncio.Future]]] = {}
+        self.scheduled = False
+
+
+_CacheKey = Tuple[str, str, Optional[str]]
+
+
+class _QueryCache:
+    """LRU cache of query results (as futures), every entry expires after its own TTL"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: 'OrderedDict[_CacheKey, Tuple[float, asyncio.Future]]' = OrderedDict()
+
+    def get(self, key: _CacheKey) -> Optional[asyncio.Future]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, future = entry
+        if time.monotonic() >= expires:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return future
+
+    def put(self, key: _CacheKey, future: asyncio.Future, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, future)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard_failed(self, key: _CacheKey, future: asyncio.Future):
+        """Drop entry if request failed, so errors are not cached"""
+        if not future.cancelled() and future.exception() is None:
+            return
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is future:
+            del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class AsyncInfluxClient(InfluxDBClient):  # pragma: no cover
+    """Influx client using aiohttp instead of requests
+
+    Single ``aiohttp.ClientSession`` is kept per event loop, so connections
+    (and TLS sessions) to Influx host are reused between queries
+    """
+
+    # pylint: disable=too-many-arguments
+
+    def __init__(self, *args, proxy='', pool_size=POOL_SIZE, keepalive_timeout=KEEPALIVE_TIMEOUT,
+                 dns_cache_ttl=DNS_CACHE_TTL, max_concurrency=MAX_CONCURRENCY,
+                 max_batch_size=MAX_BATCH_SIZE, batch_window=BATCH_WINDOW, chunk_size=0,
+                 cache_size=CACHE_SIZE, **kwargs):
+        self.proxy: str = proxy
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.max_concurrency = max_concurrency
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.stats = InfluxClientStats()
+        self._aio_sessions = weakref.WeakKeyDictionary()
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._batches = weakref.WeakKeyDictionary()
+        self._caches = weakref.WeakKeyDictionary()
+        super().__init__(*args, **kwargs)
+
+    def _create_connector(self) -> aiohttp.BaseConnector:
+        pool_args = dict(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+        )
+        if self.proxy:
+            return ProxyConnector.from_url(self.proxy, **pool_args)
+        return aiohttp.TCPConnector(**pool_args)
+
+    @property
+    def aio_session(self) -> aiohttp.ClientSession:
+        """Return session bound to the running loop, create new if missing"""
+        loop = asyncio.get_event_loop()
+        session: Optional[aiohttp.ClientSession] = self._aio_sessions.get(loop)
+        if session is None or session.closed:
+            LOGGER.debug('Creating new Influx session for %s', self._baseurl)
+            session = aiohttp.ClientSession(connector=self._create_connector(),
+                                            headers=self._session.headers)
+            self._aio_sessions[loop] = session
+        return session
+
+    @property
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Return concurrency limiter bound to the running loop"""
+        loop = asyncio.get_event_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Breaker shared by all clients of the Influx host"""
+        return get_circuit_breaker(self._host)
+
+    async def close(self):
+        """Close session bound to the running loop"""
+        session = self._aio_sessions.pop(asyncio.get_event_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    def _query_params(self, query, params=None, bind_params=None, epoch=None, database=None,
+                      chunked=False, chunk_size=0) -> dict:
+        if params is None:
+            params = {}
+
+        if bind_params is not None:
+            params_dict = json.loads(params.get('params', '{}'))
+            params_dict.update(bind_params)
+            params['params'] = json.dumps(params_dict)
+
+        params['q'] = query
+        params['db'] = database or self._database
+
+        if epoch is not None:
+            params['epoch'] = epoch
+
+        if chunked:
+            params['chunked'] = 'true'
+            if chunk_size > 0:
+                params['chunk_size'] = chunk_size
+        return params
+
+    # pylint:disable=invalid-overridden-method
+    async def query(self,
+                    query,
+                    params=None,
+                    bind_params=None,
+                    epoch=None,
+                    expected_response_code=200,
+                    database=None,
+                    raise_errors=True,
+                    chunked=False,
+                    chunk_size=0,
+                    method='GET'):
+        params = self._query_params(query, params, bind_params, epoch, database, chunked, chunk_size)
+
+        if query.lower().startswith('select ') and ' into ' in query.lower():
+            method = 'POST'
+
+        # noinspection PyTypeChecker
+        data = await self.request(
+            url='query',
+            method=method,
+            params=params,
+            data=None,
+            expected_response_code=expected_response_code
+        )
+
+        results = [
+            ResultSet(result, raise_errors=raise_errors)
+            for result
+            in data.get('results', [])
+        ]
+
+        if len(results) == 1:
+            return results[0]
+
+        return results
+
+    async def query_multi(self, queries: List[str], epoch=None, database=None,
+                          chunk_size=None) -> List[Tuple[Optional[InfluxResult], Optional[Exception]]]:
+        """Send several read queries as single multi-statement request
+
+        Return ``(result, error)`` pair for every query in the same order.
+        If ``chunk_size`` is set, response is requested chunked and parsed incrementally
+        """
+        if chunk_size is None:
+            chunk_size = self.chunk_size
+        params = self._query_params(';'.join(_strip_query(query) for query in queries),
+                                    epoch=epoch, database=database,
+                                    chunked=bool(chunk_size), chunk_size=chunk_size)
+        if chunk_size:
+            by_statement = await merge_chunks(self._iter_chunks(params))
+        else:
+            data = await self.request(url='query', params=params)
+            by_statement = {}
+            for index, result in enumerate(data.get('results', [])):
+                by_statement[result.get('statement_id', index)] = result
+        results = []
+        for index in range(len(queries)):
+            try:
+                raw = by_statement[index]
+            except KeyError:
+                results.append((None, InfluxDBClientError(f'No result for statement {index}')))
+                continue
+            try:
+                results.append((InfluxResult(raw), None))
+            except InfluxDBClientError as ex:
+                results.append((None, ex))
+        return results
+
+    async def _iter_chunks(self, params: dict) -> AsyncIterator[dict]:
+        """Iterate over JSON documents of chunked response without reading whole body"""
+        kwargs = self._request_kwargs('query', 'GET', params)
+        async with self._tracked():
+            async with self.aio_session.request(**kwargs) as response:
+                if response.status != 200:
+                    _raise_for_status(await response.json(), response.status)
+                buffer = bytearray()
+                async for data in response.content.iter_any():
+                    buffer.extend(data)
+                    end = buffer.find(b'\n')
+                    while end >= 0:
+                        line = bytes(buffer[:end])
+                        del buffer[:end + 1]
+                        if line.strip():
+                            yield json.loads(line)
+                        end = buffer.find(b'\n')
+                if buffer.strip():
+                    yield json.loads(bytes(buffer))
+
+    async def query_batched(self, query: str, epoch=None, database=None) -> InfluxResult:
+        """Send query together with other queries issued within the batch window
+
+        All read queries issued during ``batch_window`` seconds after the first one
+        are sent as single multi-statement request, non-read queries are sent as is
+        """
+        if not _is_read_query(_strip_query(query)):
+            return await self.query(query, epoch=epoch, database=database)
+        loop = asyncio.get_event_loop()
+        batch = self._batches.get(loop)
+        if batch is None:
+            batch = _PendingBatch()
+            self._batches[loop] = batch
+        future = loop.create_future()
+        waiters = batch.queries.setdefault((database or self._database, epoch), {})
+        waiters.setdefault(_strip_query(query), []).append(future)
+        if not batch.scheduled:
+            batch.scheduled = True
+            loop.call_later(self.batch_window, self._dispatch_batch, batch)
+        return await future
+
+    async def query_cached(self, query: str, ttl: float, epoch=None, database=None) -> InfluxResult:
+        """Send batched query, reuse result of identical query sent less than ``ttl`` seconds ago
+
+        Concurrent lookups of the same query share single request, failed results are not cached
+        """
+        if not _is_read_query(_strip_query(query)):
+            return await self.query_batched(query, epoch=epoch, database=database)
+        loop = asyncio.get_event_loop()
+        cache = self._caches.get(loop)
+        if cache is None:
+            cache = _QueryCache(self.cache_size)
+            self._caches[loop] = cache
+        key = (database or self._database, _strip_query(query), epoch)
+        future = cache.get(key)
+        if future is not None:
+            self.stats.cache_hits += 1
+        else:
+            self.stats.cache_misses += 1
+            future = asyncio.ensure_future(self.query_batched(query, epoch=epoch, database=database))
+            cache.put(key, future, ttl)
+            future.add_done_callback(functools.partial(cache.discard_failed, key))
+        # cancelled waiter doesn't cancel request shared with others
+        return await asyncio.shield(future)
+
+    def _dispatch_batch(self, batch: _PendingBatch):
+        pending, batch.queries = batch.queries, {}
+        batch.scheduled = False
+        for (database, epoch), waiters in pending.items():
+            items = list(waiters.items())
+            for start in range(0, len(items), self.max_batch_size):
+                asyncio.ensure_future(self._send_batch(items[start:start + self.max_batch_size], epoch, database))
+
+    async def _send_batch(self, items: List[Tuple[str, List[asyncio.Future]]], epoch, database):
+        items = [(query, futures) for query, futures in items if not all(fut.done() for fut in futures)]
+        if not items:
+            return
+        try:
+            results = await self.query_multi([query for query, _ in items], epoch=epoch, database=database)
+        except Exception as ex:  # pylint:disable=broad-except
+            results = [(None, ex)] * len(items)
+        for (_, futures), (result, error) in zip(items, results):
+            for future in futures:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _request_kwargs(self, url, method='GET', params=None, data=None, headers=None) -> dict:
+        if headers is None:
+            headers = self._headers
+
+        if params is None:
+            params = {}
+
+        if isinstance(data, (dict, list)):
+            data = json.dumps(data)
+
+        kwargs = dict(
+            method=method,
+            url=f'{self._baseurl}/{url}',
+            params=params,
+            data=data,
+            headers=headers,
+            verify_ssl=self._verify_ssl,
+        )
+        if self._timeout:
+            kwargs.update(timeout=aiohttp.ClientTimeout(total=self._timeout))
+        if self._username is not None:
+            kwargs.update(auth=aiohttp.BasicAuth(self._username, self._password or ''))
+        return kwargs
+
+    @asynccontextmanager
+    async def _tracked(self):
+        """Limit concurrency of requests, collect statistics and fail fast while Influx is unavailable"""
+        async with self.circuit_breaker.guard(InfluxDBServerError), self._semaphore:
+            self.stats.in_flight += 1
+            started = time.monotonic()
+            try:
+                yield
+            except Exception:
+                self.stats.failures += 1
+                raise
+            finally:
+                self.stats.in_flight -= 1
+                self.stats.requests += 1
+                self.stats.total_time += time.monotonic() - started
+
+    # pylint:disable=invalid-overridden-method
+    async def request(self, url, method='GET', params=None, data=None,
+                      expected_response_code=200, headers=None):
+        kwargs = self._request_kwargs(url, method, params, data, headers)
+        async with self._tracked():
+            async with self.aio_session.request(**kwargs) as response:
+                data = await response.json()
+            if response.status == expected_response_code:
+                return data
+            return _raise_for_status(data, response.status)
+
+
+def _raise_for_status(data, status: int):
+    # if there's not an error, there must have been a successful response
+    if 500 <= status < 600:
+        raise InfluxDBServerError(data)
+    raise InfluxDBClientError(data, status)
+
+
+_ClientKey = Tuple[str, int, str, Optional[str]]
+_CLIENTS: Dict[_ClientKey, AsyncInfluxClient] = {}
+
+
+def get_influx_client(host: str, port: int, database: str, username: str = None, password: str = None,
+                      proxy: str = None, **kwargs) -> AsyncInfluxClient:
+    """Return client shared by all users of the same ``(host, port, database, proxy)``
+
+    Connection pool, concurrency limit and statistics are shared as well,
+    client options (e.g. ``chunk_size``) are set by the first user
+    """
+    key = (host, port, database, proxy or None)
+    client = _CLIENTS.get(key)
+    if client is None:
+        LOGGER.debug('Creating Influx client for %s:%s/%s', host, port, database)
+        client = AsyncInfluxClient(host=host, port=port, database=database,
+                                   username=username, password=password,
+                                   proxy=proxy, **kwargs)
+        _CLIENTS[key] = client
+    return client
+
+
+async def close_influx_clients():
+    """Close sessions of all shared clients bound to the running loop"""
+    await asyncio.gather(*[client.close() for client in _CLIENTS.values()])
@@ -0,0 +1,83 @@
+"""Scheduling of source polling"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from .base import PollResult, Source
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+_TICK_TOLERANCE = 0.1  # part of interval, sources due within tolerance are polled on current tick
+
+
+def _group_by_interval(sources: Iterable[Source]) -> Dict[float, List[Source]]:
+    groups: Dict[float, List[Source]] = defaultdict(list)
+    for source in sources:
+        groups[source.polling_interval].append(source)
+    return groups
+
+
+class CoalescingScheduler:
+    """Poll sources sharing the same polling interval on common tick
+
+    All sources of the group are polled at the same moment, so their queries
+    fall into the same batch window of the shared client and identical
+    queries are sent only once. Sources which backed off to longer interval
+    skip ticks until they are due
+    """
+
+    def __init__(self, sources: Iterable[Source]):
+        self.groups = _group_by_interval(sources)
+
+    async def start(self, stop_event: asyncio.Event):
+        """Start polling all groups"""
+        await asyncio.gather(*[
+            self._run_group(interval, group, stop_event) for interval, group in self.groups.items()
+        ])
+
+    @staticmethod
+    async def _run_group(interval: float, group: List[Source], stop_event: asyncio.Event):
+        loop = asyncio.get_event_loop()
+        LOGGER.info('Sources %s started with common polling interval %s',
+                    [type(src).__name__ for src in group], interval)
+        due = {src: 0.0 for src in group}
+        while not stop_event.is_set():
+            tick = loop.time()
+            polled = [src for src in group if due[src] <= tick + interval * _TICK_TOLERANCE]
+            results = await asyncio.gather(*[src.poll() for src in polled], return_exceptions=True)
+            for src, result in zip(polled, results):
+                if isinstance(result, Exception):
+                    LOGGER.error('Polling of %s failed', type(src).__name__, exc_info=result)
+                    result = PollResult.FAILED
+                due[src] = tick + src.next_interval(result)
+            await asyncio.sleep(max(0.0, tick + interval - loop.time()))
+
+
+class SpreadScheduler:
+    """Poll every source independently with phases spread evenly across polling interval
+
+    ``i``-th of ``n`` sources sharing the same interval is started ``i * interval / n``
+    seconds later, so polling of the sources (and messages they produce) is not synchronised
+    """
+
+    def __init__(self, sources: Iterable[Source]):
+        self.phases: Dict[Source, float] = {}
+        for interval, group in _group_by_interval(sources).items():
+            for index, source in enumerate(group):
+                self.phases[source] = index * interval / len(group)
+
+    async def start(self, stop_event: asyncio.Event):
+        """Start polling all sources"""
+        await asyncio.gather(*[
+            source.start(stop_event, phase) for source, phase in self.phases.items()
+        ])
+
+
+COALESCED = 'coalesced'
+SPREAD = 'spread'
+SCHEDULERS = {
+    COALESCED: CoalescingScheduler,
+    SPREAD: SpreadScheduler,
+}
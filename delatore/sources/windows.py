@@ -0,0 +1,286 @@
+"""Time windows of points received by Influx queries"""
+from collections import deque
+from statistics import mean
+from typing import Any, Collection, Deque, Dict, Hashable, List, NamedTuple, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+WINDOW_SIZE = 128  # maximal number of points kept per series
+
+
+class WindowCheck(NamedTuple):
+    """Series failing staleness or threshold checks"""
+    stale: List[Hashable]
+    tripped: List[Hashable]
+
+
+class SeriesWindow:
+    """Points of single series not older than ``span`` seconds, at most ``size`` last points
+
+    Point with the same timestamp as the last one replaces it (e.g. partial ``GROUP BY time`` bucket
+    read again), older points are ignored as already consumed
+    """
+
+    __slots__ = ('span', 'last_seen', 'last_seconds', '_times', '_values')
+
+    def __init__(self, span: float, size: int = WINDOW_SIZE):
+        self.span = span
+        self.last_seen: Any = None  # timestamp of the last point as received from Influx
+        self.last_seconds: Optional[float] = None
+        self._times: Deque[float] = deque(maxlen=size)
+        self._values: Deque[Any] = deque(maxlen=size)  # kept apart from times, so min/max run over plain deque
+
+    def add(self, seconds: float, value, timestamp) -> bool:
+        """Add point with ``seconds`` POSIX time, return ``False`` if point is already consumed"""
+        if self.last_seconds is not None:
+            if seconds < self.last_seconds:
+                return False
+            if seconds == self.last_seconds and self._times:
+                self._times.pop()
+                self._values.pop()
+        self._times.append(seconds)
+        self._values.append(value)
+        self.last_seen = timestamp
+        self.last_seconds = seconds
+        return True
+
+    def trim(self, now: float):
+        """Drop points older than ``span`` seconds before ``now``"""
+        times = self._times
+        while times and times[0] <= now - self.span:
+            times.popleft()
+            self._values.popleft()
+
+    def values(self) -> List:
+        return list(self._values)
+
+    def min(self):
+        return min(self._values)
+
+    def max(self):
+        return max(self._values)
+
+    def mean(self) -> float:
+        return mean(self._values)
+
+    def __len__(self):
+        return len(self._times)
+
+
+class WindowedStore:
+    """Windows of several series, e.g. one per host"""
+
+    def __init__(self, span: float, size: int = WINDOW_SIZE):
+        self.span = span
+        self.size = size
+        self._windows: Dict[Hashable, SeriesWindow] = {}
+
+    def window(self, key: Hashable) -> SeriesWindow:
+        """Return window of the series, create new if missing"""
+        window = self._windows.get(key)
+        if window is None:
+            window = SeriesWindow(self.span, self.size)
+            self._windows[key] = window
+        return window
+
+    def add(self, key: Hashable, seconds: float, value, timestamp) -> bool:
+        """Add point to the series window"""
+        return self.window(key).add(seconds, value, timestamp)
+
+    def trim(self, now: float):
+        """Drop outdated points, series are kept with their ``last_seen`` timestamps"""
+        for window in self._windows.values():
+            window.trim(now)
+
+    def cursor(self) -> Any:
+        """Return Influx timestamp new points should be queried since
+
+        Series without points in the window are not taken into account,
+        ``None`` is returned if there are no such series
+        """
+        oldest: Optional[SeriesWindow] = None
+        for window in self._windows.values():
+            if window and (oldest is None or window.last_seconds < oldest.last_seconds):
+                oldest = window
+        if oldest is None:
+            return None
+        return oldest.last_seen
+
+    def check(self, now: float, timeout: float, all_above: float = None, all_at_most: float = None) -> WindowCheck:
+        """Return series with last point older than ``timeout`` seconds and fresh series which window
+        values are all above ``all_above`` or all not above ``all_at_most``
+        """
+        # pylint:disable=protected-access
+        stale, tripped = [], []
+        check_above, check_at_most = all_above is not None, all_at_most is not None
+        oldest = now - timeout
+        for key, window in self._windows.items():
+            values = window._values  # plain deque, hot loop avoids method calls per series
+            if window.last_seconds < oldest:
+                stale.append(key)
+            elif values and ((check_above and min(values) > all_above) or
+                             (check_at_most and max(values) <= all_at_most)):
+                tripped.append(key)
+        return WindowCheck(stale, tripped)
+
+    def retain(self, keys: Collection[Hashable]):
+        """Drop series not listed in ``keys``"""
+        for key in [key for key in self._windows if key not in keys]:
+            del self._windows[key]
+
+    def values(self, key: Hashable) -> List:
+        return self._windows[key].values()
+
+    def mean(self, key: Hashable) -> float:
+        return self._windows[key].mean()
+
+    def last_seen(self, key: Hashable):
+        return self._windows[key].last_seen
+
+    def keys(self) -> List[Hashable]:
+        return list(self._windows)
+
+    def __contains__(self, key: Hashable):
+        return key in self._windows
+
+    def __len__(self):
+        return len(self._windows)
+
+
+class ArrayWindowStore:
+    """Windows of all series in ``series × size`` ring buffers of point times and values
+
+    Has the same interface as ``WindowedStore``, values have to be numeric
+    """
+
+    def __init__(self, span: float, size: int = WINDOW_SIZE, capacity: int = 16):
+        self.span = span
+        self.size = size
+        self._index: Dict[Hashable, int] = {}
+        self._keys: List[Hashable] = []
+        self._last_seen: List[Any] = []
+        self._times = np.full((capacity, size), -np.inf)
+        self._values = np.full((capacity, size), np.nan)
+        self._next = np.zeros(capacity, dtype=np.intp)  # slot of the next point
+        self._last = np.full(capacity, -np.inf)  # time of the last point
+
+    def _row(self, key: Hashable) -> int:
+        row = self._index.get(key)
+        if row is not None:
+            return row
+        row = len(self._keys)
+        if row == len(self._last):
+            self._grow()
+        self._index[key] = row
+        self._keys.append(key)
+        self._last_seen.append(None)
+        return row
+
+    def _grow(self):
+        capacity = len(self._last)
+        self._times = np.vstack([self._times, np.full((capacity, self.size), -np.inf)])
+        self._values = np.vstack([self._values, np.full((capacity, self.size), np.nan)])
+        self._next = np.concatenate([self._next, np.zeros(capacity, dtype=np.intp)])
+        self._last = np.concatenate([self._last, np.full(capacity, -np.inf)])
+
+    def add(self, key: Hashable, seconds: float, value, timestamp) -> bool:
+        """Add point to the series window"""
+        row = self._row(key)
+        last = self._last[row]
+        if seconds < last:
+            return False
+        if seconds == last:
+            slot = (self._next[row] - 1) % self.size
+        else:
+            slot = self._next[row]
+            self._next[row] = (slot + 1) % self.size
+        self._times[row, slot] = seconds
+        self._values[row, slot] = value
+        self._last[row] = seconds
+        self._last_seen[row] = timestamp
+        return True
+
+    def trim(self, now: float):
+        """Drop outdated points, series are kept with their ``last_seen`` timestamps"""
+        outdated = self._times <= now - self.span
+        self._times[outdated] = -np.inf
+        self._values[outdated] = np.nan
+
+    def _present(self, count: int):
+        return np.isfinite(self._times[:count])
+
+    def cursor(self) -> Any:
+        """Return Influx timestamp new points should be queried since
+
+        Series without points in the window are not taken into account,
+        ``None`` is returned if there are no such series
+        """
+        count = len(self._keys)
+        not_empty = self._present(count).any(axis=1)
+        if not not_empty.any():
+            return None
+        row = int(np.argmin(np.where(not_empty, self._last[:count], np.inf)))
+        return self._last_seen[row]
+
+    def check(self, now: float, timeout: float, all_above: float = None, all_at_most: float = None) -> WindowCheck:
+        """Return series with last point older than ``timeout`` seconds and fresh series which window
+        values are all above ``all_above`` or all not above ``all_at_most``
+        """
+        count = len(self._keys)
+        stale = now - self._last[:count] > timeout
+        present = self._present(count)
+        values = self._values[:count]
+        tripped = np.zeros(count, dtype=bool)
+        if all_above is not None:
+            tripped |= np.where(present, values, np.inf).min(axis=1) > all_above
+        if all_at_most is not None:
+            tripped |= np.where(present, values, -np.inf).max(axis=1) <= all_at_most
+        tripped &= ~stale & present.any(axis=1)
+        keys = self._keys
+        return WindowCheck([keys[row] for row in np.flatnonzero(stale)],
+                           [keys[row] for row in np.flatnonzero(tripped)])
+
+    def retain(self, keys: Collection[Hashable]):
+        """Drop series not listed in ``keys``, rows of kept series are moved up"""
+        kept = [row for row, key in enumerate(self._keys) if key in keys]
+        if len(kept) == len(self._keys):
+            return
+        count = len(kept)
+        for array, empty in ((self._times, -np.inf), (self._values, np.nan), (self._next, 0), (self._last, -np.inf)):
+            array[:count] = array[kept]
+            array[count:] = empty
+        self._keys = [self._keys[row] for row in kept]
+        self._last_seen = [self._last_seen[row] for row in kept]
+        self._index = {key: row for row, key in enumerate(self._keys)}
+
+    def values(self, key: Hashable) -> List:
+        row = self._index[key]
+        present = self._present(len(self._keys))[row]
+        order = np.argsort(self._times[row][present], kind='stable')
+        return self._values[row][present][order].tolist()
+
+    def mean(self, key: Hashable) -> float:
+        values = self.values(key)
+        return mean(values)
+
+    def last_seen(self, key: Hashable):
+        return self._last_seen[self._index[key]]
+
+    def keys(self) -> List[Hashable]:
+        return list(self._keys)
+
+    def __contains__(self, key: Hashable):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def create_window_store(span: float, size: int = WINDOW_SIZE):
+    """Return array backed store if NumPy is available, pure Python one otherwise"""
+    if np is None:
+        return WindowedStore(span, size)
+    return ArrayWindowStore(span, size)
@@ -1,8 +1,11 @@
-import copy
+import hashlib
 import logging
+from abc import ABC, abstractmethod
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Iterable, Optional, Tuple, Union
+
+from .serialization import dumps_json
 
 UNIFIED_TIME_PATTERN = '%d.%m.%Y %H:%M'
 
@@ -26,49 +29,190 @@ class Status(Enum):
         return cls._INVALID
 
 
-def generate_message(source: str, status_list: List[dict]) -> dict:
+class _Immutable(ABC):
+    """Base of immutable slotted records, read-only mapping access is kept for compatibility with dicts"""
+
+    __slots__ = ()
+    _cached = ()  # lazily set slots, not part of the dict form
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, key):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def _set(self, **fields):
+        for key, value in fields.items():
+            object.__setattr__(self, key, value)
+
+    @abstractmethod
+    def _keys(self) -> Tuple[str, ...]:
+        """Return keys of the dict form of the record"""
+
+    @abstractmethod
+    def to_dict(self) -> dict:
+        """Return plain dict form of the record"""
+
+    def __getitem__(self, key: str):
+        if key not in self._keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str):
+        return key in self._keys()
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._keys() else default
+
+    def keys(self):
+        return self._keys()
+
+    def __eq__(self, other):
+        if isinstance(other, _Immutable):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, key) for key in self.__slots__ if key not in self._cached))
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+
+class StatusRecord(_Immutable):
+    """Single status line"""
+
+    __slots__ = ('name', 'status', 'error', 'timestamp', 'details_url')
+    _KEYS = ('name', 'status', 'timestamp', 'details_url')
+    _ERROR_KEYS = ('name', 'status', 'error', 'timestamp', 'details_url')
+
+    name: str
+    status: str
+    error: Optional[str]
+    timestamp: Optional[str]
+    details_url: Optional[str]
+
+    def __init__(self, name: str, status: Status, timestamp: Optional[str] = None,
+                 details_url: Optional[str] = None, error: Optional[str] = None):
+        self._set(name=name, status=status.value, error=error, timestamp=timestamp, details_url=details_url)
+
+    def _keys(self):
+        return self._KEYS if self.error is None else self._ERROR_KEYS
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self._keys()}
+
+
+class _Message(_Immutable):
+    """Message with cached serialised form"""
+
+    __slots__ = ()
+    _cached = ('_json',)
+
+    def to_json(self) -> str:
+        """Return JSON form of the message, serialised once"""
+        try:
+            return self._json
+        except AttributeError:
+            self._set(_json=dumps_json(self.to_dict()))
+            return self._json
+
+
+def _fingerprint(statuses: Iterable[Tuple[str, str]]) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    for name, status in sorted(dict(statuses).items()):
+        digest.update(f'{name}\x1f{status}\x1e'.encode())
+    return digest.digest()
+
+
+class StatusMessage(_Message):
+    """Status message of the source
+
+    ``fingerprint`` is stable hash of ``{name: status}`` pairs of the message computed once on creation,
+    messages with the same statuses have the same fingerprint regardless of order, time or details.
+    ``has_errors`` is set if any of status lines reports error
+    """
+
+    __slots__ = ('source', 'status_list', 'message_timestamp', 'fingerprint', 'has_errors', '_json')
+    _cached = ('fingerprint', 'has_errors', '_json')
+    _KEYS = ('source', 'status_list', 'message_timestamp')
+
+    source: str
+    status_list: Tuple[StatusRecord, ...]
+    message_timestamp: float
+    fingerprint: bytes
+    has_errors: bool
+
+    def __init__(self, source: str, status_list: Iterable[StatusRecord], message_timestamp: float = None):
+        status_list = tuple(status_list)
+        if message_timestamp is None:
+            message_timestamp = datetime.utcnow().timestamp()
+        self._set(source=source, status_list=status_list, message_timestamp=message_timestamp,
+                  fingerprint=_fingerprint((rec.name, rec.status) for rec in status_list),
+                  has_errors=any(rec.error is not None for rec in status_list))
+
+    def _keys(self):
+        return self._KEYS
+
+    def to_dict(self) -> dict:
+        return {
+            'source': self.source,
+            'status_list': [record.to_dict() for record in self.status_list],
+            'message_timestamp': self.message_timestamp,
+        }
+
+
+class ErrorMessage(_Message):
+    """Error message of the source"""
+
+    __slots__ = ('source', 'error', 'fingerprint', '_json')
+    _cached = ('fingerprint', '_json')
+    _KEYS = ('source', 'error')
+
+    source: str
+    error: str
+    fingerprint: bytes
+
+    def __init__(self, source: str, error: str):
+        self._set(source=source, error=error, fingerprint=_fingerprint([('error', error)]))
+
+    def _keys(self):
+        return self._KEYS
+
+    def to_dict(self) -> dict:
+        return {'source': self.source, 'error': self.error}
+
+
+Message = Union[StatusMessage, ErrorMessage]
+
+
+def generate_message(source: str, status_list: Iterable[StatusRecord]) -> StatusMessage:
     """Generate status message"""
-    return {
-        'source': source,
-        'status_list': copy.deepcopy(status_list),
-        'message_timestamp': datetime.utcnow().timestamp()
-    }
+    return StatusMessage(source, status_list)
 
 
-def generate_error(source: str, error: str):
+def generate_error(source: str, error: str) -> ErrorMessage:
     """Generate error message"""
-    return {
-        'source': source,
-        'error': error,
-    }
+    return ErrorMessage(source, error)
 
 
 def generate_status(name: str,
                     status: Status,
                     timestamp: Optional[str] = None,
-                    details_url: Optional[str] = None) -> dict:
+                    details_url: Optional[str] = None) -> StatusRecord:
     """Generate single status line"""
-    return {
-        'name': name,
-        'status': status.value,
-        'timestamp': timestamp,
-        'details_url': details_url,
-    }
+    return StatusRecord(name, status, timestamp, details_url)
 
 
 def generate_error_status(name: str,
                           error: str,
                           status: Status,
                           timestamp: Optional[str] = None,
-                          details_url: Optional[str] = None) -> dict:
+                          details_url: Optional[str] = None) -> StatusRecord:
     """Generate single error status line"""
-    return {
-        'name': name,
-        'status': status.value,
-        'error': error,
-        'timestamp': timestamp,
-        'details_url': details_url,
-    }
+    return StatusRecord(name, status, timestamp, details_url, error)
 
 
 def convert_timestamp(timestamp: str, timestamp_fmt: str) -> str:
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+
+import pytest
+
+from delatore.bus import LocalBus
+from delatore.serialization import decode, encode
+from delatore.unified_json import Status, generate_message, generate_status
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_message_passed_by_reference():
+    bus = LocalBus()
+    pub, sub, other = bus.get_client(), bus.get_client(), bus.get_client()
+    for client in (sub, other):
+        await client.start_consuming()
+    await sub.subscribe('changes')
+    message = generate_message('influxdb', [generate_status('TEST', Status.OK)])
+    await pub.publish('changes', encode(message, pub))
+    assert decode(await sub.get(.1)) is message
+    assert await other.get(.05) is None
+
+
+async def test_subscriber_in_other_thread():
+    bus = LocalBus()
+    pub = bus.get_client()
+    received = []
+    subscribed = threading.Event()
+
+    async def _consume():
+        sub = bus.get_client()
+        await sub.start_consuming()
+        await sub.subscribe('changes')
+        subscribed.set()
+        received.append(await sub.get(2))
+
+    thread = threading.Thread(target=lambda: asyncio.run(_consume()))
+    thread.start()
+    await asyncio.get_event_loop().run_in_executor(None, subscribed.wait, 2)
+    await pub.publish('changes', 'data')
+    await asyncio.get_event_loop().run_in_executor(None, thread.join, 2)
+    assert received == ['data']
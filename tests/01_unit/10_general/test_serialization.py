@@ -0,0 +1,28 @@
+import pytest
+
+from delatore import serialization
+from delatore.serialization import JSON, MSGPACK, decode, encode, set_codec
+from delatore.unified_json import Status, generate_message, generate_status
+
+
+@pytest.fixture(params=[JSON, MSGPACK])
+def codec(request):
+    if request.param == MSGPACK:
+        pytest.importorskip('msgpack')
+    set_codec(request.param)
+    yield request.param
+    set_codec(JSON)
+
+
+def test_round_trip(codec):
+    message = generate_message('influxdb', [generate_status('TEST1', Status.OK, '09.08.2005 18:31')])
+    payload = encode(message)
+    assert isinstance(payload, str)
+    assert decode(payload) == message
+    assert decode(payload) is decode(payload)  # decoded once for all subscribers
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        set_codec('pickle')
+    assert serialization.get_codec().name == JSON
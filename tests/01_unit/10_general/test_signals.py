@@ -0,0 +1,50 @@
+import asyncio
+import threading
+
+import pytest
+
+from delatore.bus import LocalBus
+from delatore.outputs.consumer import next_batch, watch_stop
+from delatore.signals import StopSignal
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_stop_signal_in_other_thread():
+    signal = StopSignal()
+    waiting = threading.Event()
+
+    async def _wait():
+        task = asyncio.ensure_future(signal.wait())
+        await asyncio.sleep(0)
+        waiting.set()
+        await asyncio.wait_for(task, 2)
+
+    thread = threading.Thread(target=lambda: asyncio.run(_wait()))
+    thread.start()
+    await asyncio.get_event_loop().run_in_executor(None, waiting.wait, 2)
+    local = asyncio.ensure_future(signal.wait())
+    await asyncio.sleep(0)
+    signal.set()
+    assert await asyncio.wait_for(local, .1)
+    await asyncio.get_event_loop().run_in_executor(None, thread.join, 2)
+    assert not thread.is_alive()
+    assert await signal.wait()
+
+
+async def test_next_batch():
+    bus = LocalBus()
+    pub, sub = bus.get_client(), bus.get_client()
+    await sub.start_consuming()
+    await sub.subscribe('changes')
+    signal = StopSignal()
+    stopped = watch_stop(signal)
+    for index in range(3):
+        await pub.publish('changes', index)
+    assert await next_batch(sub, stopped) == [0, 1, 2]
+    assert await next_batch(sub, stopped, .01) == []
+    batch = asyncio.ensure_future(next_batch(sub, stopped))
+    await asyncio.sleep(.01)
+    signal.set()
+    assert await asyncio.wait_for(batch, .1) == []
+    assert stopped.done()
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from delatore.unified_json import Status, generate_error, generate_error_status, generate_message, generate_status
+
+
+def _message(*statuses, source='influxdb'):
+    return generate_message(source, [generate_status(name, status, '09.08.2005 18:31') for name, status in statuses])
+
+
+def test_message_compatible_with_dict():
+    message = generate_message('influxdb', [
+        generate_status('TEST1', Status.OK),
+        generate_error_status('TEST2', 'no reads', Status.ALERTING),
+    ])
+    data = json.loads(message.to_json())
+    assert message == data
+    assert message.to_dict() == data
+    assert data['status_list'][0] == {'name': 'TEST1', 'status': 'ok', 'timestamp': None, 'details_url': None}
+    assert list(data['status_list'][1]) == ['name', 'status', 'error', 'timestamp', 'details_url']
+    assert message['status_list'][1]['error'] == 'no reads'
+    assert 'error' not in message['status_list'][0]
+    assert generate_error('awx_api', 'failed') == {'source': 'awx_api', 'error': 'failed'}
+
+
+def test_message_immutable():
+    message = _message(('TEST1', Status.OK))
+    with pytest.raises(AttributeError):
+        message.source = 'other'
+    with pytest.raises(AttributeError):
+        message.status_list[0].status = 'fail'
+    assert message.to_json() is message.to_json()
+
+
+def test_fingerprint():
+    message = _message(('TEST1', Status.OK), ('TEST2', Status.FAIL))
+    assert message.fingerprint == _message(('TEST2', Status.FAIL), ('TEST1', Status.OK)).fingerprint
+    assert message.fingerprint != _message(('TEST1', Status.OK), ('TEST2', Status.OK)).fingerprint
+    assert message.fingerprint != _message(('TEST1', Status.OK)).fingerprint
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+from delatore.sources.base import OUTAGE_TOPIC, PollResult, Source
+from delatore.sources.circuit_breaker import (
+    BreakerState, CircuitBreaker, UpstreamError, UpstreamUnavailable, check_status
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _request(breaker: CircuitBreaker, error: Exception = None):
+    async with breaker.guard():
+        if error is not None:
+            raise error
+
+
+async def test_breaker_states():
+    breaker = CircuitBreaker('influx', failure_threshold=2, reset_timeout=.05)
+    for _ in range(2):
+        with pytest.raises(asyncio.TimeoutError):
+            await _request(breaker, asyncio.TimeoutError())
+    assert breaker.state is BreakerState.OPEN
+    with pytest.raises(UpstreamUnavailable):
+        await _request(breaker)
+
+    await asyncio.sleep(.07)
+    assert breaker.state is BreakerState.HALF_OPEN
+    with pytest.raises(ConnectionError):
+        await _request(breaker, ConnectionError())
+    assert breaker.state is BreakerState.OPEN
+
+    await asyncio.sleep(.07)
+    await _request(breaker)
+    assert breaker.state is BreakerState.CLOSED
+
+
+async def test_client_errors_not_counted():
+    breaker = CircuitBreaker('influx', failure_threshold=1)
+    with pytest.raises(ValueError):
+        await _request(breaker, ValueError())
+    assert breaker.state is BreakerState.CLOSED
+
+
+async def test_error_status_counted():
+    breaker = CircuitBreaker('awx', failure_threshold=1)
+    with pytest.raises(UpstreamError):
+        async with breaker.guard():
+            check_status(breaker.host, 502)
+    assert breaker.state is BreakerState.OPEN
+
+
+async def test_trial_not_reset_by_other_requests():
+    breaker = CircuitBreaker('influx', failure_threshold=1, reset_timeout=.05)
+    slow = asyncio.get_event_loop().create_future()
+    started = asyncio.ensure_future(_request_after(breaker, slow))
+    await asyncio.sleep(0)
+    with pytest.raises(asyncio.TimeoutError):
+        await _request(breaker, asyncio.TimeoutError())
+    await asyncio.sleep(.07)
+    async with breaker.guard():  # trial request
+        slow.set_exception(asyncio.TimeoutError())  # request started before circuit was opened fails
+        with pytest.raises(asyncio.TimeoutError):
+            await started
+        await asyncio.sleep(.07)
+        with pytest.raises(UpstreamUnavailable):  # trial is still running
+            await _request(breaker)
+
+
+async def _request_after(breaker: CircuitBreaker, done: asyncio.Future):
+    async with breaker.guard():
+        await done
+
+
+class PublishedMessages:
+
+    def __init__(self):
+        self.messages = []
+
+    async def publish(self, topic, data):
+        self.messages.append((topic, json.loads(data)))
+
+
+class UnavailableSource(Source):
+    CONFIG_ID = 'influxdb'
+
+    def __init__(self, client, breaker):
+        super().__init__(client)
+        self.breaker = breaker
+
+    async def get_update(self):
+        raise UpstreamUnavailable(self.breaker)
+
+
+async def test_single_outage_report():
+    client = PublishedMessages()
+    breaker = CircuitBreaker('influx.host')
+    sources = [UnavailableSource(client, breaker) for _ in range(3)]
+    results = await asyncio.gather(*[src.poll() for src in sources])
+    assert results == [PollResult.FAILED] * 3
+    assert len(client.messages) == 1
+    topic, message = client.messages[0]
+    assert topic == OUTAGE_TOPIC
+    assert message['source'] == 'influx.host'
+    assert message['status_list'][0]['error'] == 'Upstream influx.host is unavailable'
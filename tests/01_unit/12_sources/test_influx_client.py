@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from influxdb.exceptions import InfluxDBClientError
+
+from delatore.sources import InfluxSource, InfluxSourceLBTiming
+from delatore.sources.influx_client import AsyncInfluxClient, InfluxResult, get_influx_client, merge_chunks
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def influx_client():
+    return AsyncInfluxClient(host='localhost', port=8086, database='csm')
+
+
+async def test_session_reused(influx_client):
+    session = influx_client.aio_session
+    assert influx_client.aio_session is session
+    await influx_client.close()
+    assert session.closed
+    assert influx_client.aio_session is not session
+    await influx_client.close()
+
+
+def test_client_shared():
+    client = get_influx_client('localhost', 8086, 'csm', username='csm')
+    assert get_influx_client('localhost', 8086, 'csm', username='csm') is client
+    assert get_influx_client('localhost', 8086, 'csm', proxy='socks5://localhost:1080') is not client
+    assert get_influx_client('localhost', 8086, 'other') is not client
+
+
+def test_sources_share_client():
+    assert InfluxSource(None).influx_client is InfluxSourceLBTiming(None).influx_client
+    assert InfluxSource(None).influx_client.chunk_size == InfluxSource._params.chunk_size
+
+
+def _patch_request(client, requests):
+    async def _request(url, method='GET', params=None, **_):
+        requests.append(params['q'])
+        statements = params['q'].split(';')
+        return {'results': [
+            {'statement_id': index, 'series': [{'name': 'm', 'columns': ['time', 'q'], 'values': [['t', stmt]]}]}
+            for index, stmt in enumerate(statements)
+        ]}
+
+    client.request = _request
+
+
+async def test_queries_batched(influx_client):
+    requests = []
+    _patch_request(influx_client, requests)
+    queries = [f'SELECT LAST(value) FROM m{i} LIMIT 1;' for i in range(5)]
+    results = await asyncio.gather(*[influx_client.query_batched(query) for query in queries])
+    assert len(requests) == 1
+    assert [res.raw['series'][0]['values'][0][1] for res in results] == [q.rstrip(';') for q in queries]
+
+
+async def test_batch_statement_error(influx_client):
+    async def _request(*_, **__):
+        return {'results': [{'statement_id': 0, 'series': []}, {'statement_id': 1, 'error': 'bad query'}]}
+
+    influx_client.request = _request
+    good, bad = await asyncio.gather(influx_client.query_batched('SELECT * FROM a'),
+                                     influx_client.query_batched('SELECT * FROM b'),
+                                     return_exceptions=True)
+    assert isinstance(bad, InfluxDBClientError)
+    assert not isinstance(good, Exception)
+
+
+async def test_identical_queries_sent_once(influx_client):
+    requests = []
+    _patch_request(influx_client, requests)
+    query = 'SELECT LAST(usage_system) FROM cpu GROUP BY host LIMIT 1;'
+    first, second = await asyncio.gather(influx_client.query_batched(query), influx_client.query_batched(query))
+    assert requests == [query.rstrip(';')]
+    assert first.raw == second.raw
+
+
+async def test_merge_chunks():
+    chunks = [
+        {'results': [{'statement_id': 0, 'partial': True, 'series': [
+            {'name': 'diskio', 'tags': {'host': 'a'}, 'columns': ['time', 'reads'], 'values': [[1, 1]]},
+            {'name': 'diskio', 'tags': {'host': 'b'}, 'columns': ['time', 'reads'], 'values': [[1, 2]],
+             'partial': True},
+        ]}]},
+        {'results': [{'statement_id': 0, 'series': [
+            {'name': 'diskio', 'tags': {'host': 'b'}, 'columns': ['time', 'reads'], 'values': [[2, 3]]},
+        ]}, {'statement_id': 1, 'error': 'bad query'}]},
+    ]
+    async def _iter_chunks():
+        for chunk in chunks:
+            yield chunk
+
+    merged = await merge_chunks(_iter_chunks())
+    series = InfluxResult(merged[0]).series
+    assert [srs['tags']['host'] for srs in series] == ['a', 'b']
+    assert series[1]['values'] == [[1, 2], [2, 3]]
+    assert 'partial' not in series[1]
+    with pytest.raises(InfluxDBClientError):
+        InfluxResult(merged[1])
+
+
+async def test_query_cached(influx_client):
+    requests = []
+    _patch_request(influx_client, requests)
+    query = 'SELECT MAX(usage_user) FROM cpu WHERE host=~/scn3/ GROUP BY host LIMIT 1;'
+    first, second = await asyncio.gather(influx_client.query_cached(query, 1),
+                                         influx_client.query_cached(query, 1))
+    assert first is second
+    assert await influx_client.query_cached(query, 1) is first
+    assert len(requests) == 1
+    assert (influx_client.stats.cache_hits, influx_client.stats.cache_misses) == (2, 1)
+
+
+async def test_query_cache_expires(influx_client):
+    requests = []
+    _patch_request(influx_client, requests)
+    await influx_client.query_cached('SELECT * FROM a', .01)
+    await asyncio.sleep(.02)
+    await influx_client.query_cached('SELECT * FROM a', .01)
+    assert len(requests) == 2
+
+
+async def test_query_cache_errors_not_cached(influx_client):
+    async def _request(*_, **__):
+        return {'results': [{'statement_id': 0, 'error': 'bad query'}]}
+
+    influx_client.request = _request
+    for _ in range(2):
+        with pytest.raises(InfluxDBClientError):
+            await influx_client.query_cached('SELECT * FROM a', 10)
+    assert influx_client.stats.cache_misses == 2
+
+
+async def test_query_cache_bounded(influx_client):
+    influx_client.cache_size = 2
+    _patch_request(influx_client, [])
+    for name in 'abc':
+        await influx_client.query_cached(f'SELECT * FROM {name}', 10)
+    await influx_client.query_cached('SELECT * FROM a', 10)
+    assert influx_client.stats.cache_misses == 4
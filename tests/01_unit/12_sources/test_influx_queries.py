@@ -0,0 +1,24 @@
+import pytest
+
+from delatore.sources import INFLUX_SOURCES, InfluxSourceDiskStateReadSFS, InfluxSourceRDSTest
+
+
+@pytest.mark.parametrize('source_cls', INFLUX_SOURCES)
+def test_static_queries_compiled(source_cls):
+    for query in source_cls._queries.values():
+        assert '{' not in query
+
+
+def test_disk_state_query_params():
+    query = InfluxSourceDiskStateReadSFS._queries[InfluxSourceDiskStateReadSFS._params.metrics[0]]
+    assert 'FROM nfsiostat' in query
+    assert 'type=~/read/' in query
+
+
+def test_dynamic_query_memoised():
+    source = InfluxSourceRDSTest(None)
+    metric = source._params.metrics[1]
+    assert metric not in source._queries
+    query = source._metric_query(metric, column='tup_fetched')
+    assert 'MEAN(tup_fetched)' in query
+    assert source._metric_query(metric, column='tup_fetched') is query
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from delatore.sources import InfluxSource
+from delatore.sources.influx import InfluxTimestampParseException, _convert_time
+from delatore.unified_json import UNIFIED_TIME_PATTERN
+
+
+@pytest.mark.parametrize(('timestamp', 'expected'), [
+    ('2020-10-21T12:14:11.123456789Z', datetime(2020, 10, 21, 12, 14, 11, 123456)),
+    ('2020-10-21T12:14:11.5Z', datetime(2020, 10, 21, 12, 14, 11, 500000)),
+    ('2020-10-21T12:14:11.000012Z', datetime(2020, 10, 21, 12, 14, 11, 12)),
+    ('2020-10-21T12:14:11Z', datetime(2020, 10, 21, 12, 14, 11, 123456)),
+])
+def test_convert_time(timestamp, expected):
+    assert _convert_time(timestamp) == expected
+
+
+@pytest.mark.parametrize('timestamp', [
+    '2020-10-21T12:14:11',
+    '2020-10-21 12:14:11Z',
+    '2020-10-21T12:14:11.Z',
+    '2020-10-21T12:14:11.12a4Z',
+    '2020-13-21T12:14:11Z',
+    '',
+])
+def test_convert_invalid_time(timestamp):
+    with pytest.raises(InfluxTimestampParseException):
+        _convert_time(timestamp)
+
+
+@pytest.fixture(params=[None, 'ns', 's'])
+def epoch_source(request):
+    source = InfluxSource(None)
+    source._params = source._params._replace(epoch=request.param)
+    return source
+
+
+def _influx_time(source, moment: datetime):
+    if source._params.epoch == 'ns':
+        return int(moment.timestamp()) * 10 ** 9
+    if source._params.epoch == 's':
+        return int(moment.timestamp())
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def test_staleness(epoch_source):
+    now = datetime.now(timezone.utc)
+    assert not epoch_source._is_stale(_influx_time(epoch_source, now - timedelta(seconds=10)), 300)
+    assert epoch_source._is_stale(_influx_time(epoch_source, now - timedelta(seconds=600)), 300)
+
+
+def test_format_time(epoch_source):
+    moment = datetime(2020, 10, 21, 12, 14, 11, tzinfo=timezone.utc)
+    assert epoch_source._format_time(_influx_time(epoch_source, moment)) == moment.strftime(UNIFIED_TIME_PATTERN)
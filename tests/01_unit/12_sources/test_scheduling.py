@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from delatore.sources.base import NoUpdates, PollResult, Source
+from delatore.sources.scheduling import CoalescingScheduler, SpreadScheduler
+from delatore.unified_json import Status, generate_message, generate_status
+
+pytestmark = pytest.mark.asyncio
+
+
+class PublishedMessages:
+
+    def __init__(self):
+        self.messages = []
+
+    async def publish(self, topic, data):
+        self.messages.append((topic, data))
+
+
+class DummySource(Source):
+    CONFIG_ID = 'influxdb'
+
+    def __init__(self, client, polling_interval):
+        super().__init__(client)
+        self.polling_interval = polling_interval
+        self.polled_at = []
+
+    async def get_update(self):
+        self.polled_at.append(asyncio.get_event_loop().time())
+        return generate_message(self.CONFIG_ID, [generate_status('test', Status.OK)])
+
+
+async def test_sources_polled_on_common_tick():
+    client = PublishedMessages()
+    sources = [DummySource(client, .05), DummySource(client, .05), DummySource(client, 1)]
+    stop_event = asyncio.Event()
+    scheduler = CoalescingScheduler(sources)
+    assert len(scheduler.groups) == 2
+    task = asyncio.ensure_future(scheduler.start(stop_event))
+    await asyncio.sleep(.12)
+    stop_event.set()
+    await asyncio.wait_for(task, 2)
+    fast_1, fast_2, slow = sources
+    assert len(fast_1.polled_at) == len(fast_2.polled_at) >= 2
+    assert [round(tm, 2) for tm in fast_1.polled_at] == [round(tm, 2) for tm in fast_2.polled_at]
+    assert len(slow.polled_at) == 1
+    assert len(client.messages) == 3  # duplicates are not published
+
+
+def test_next_interval():
+    source = DummySource(PublishedMessages(), 10)
+    source.max_polling_interval = 50
+    intervals = [source.next_interval(result) for result in [
+        PollResult.CHANGED, PollResult.SAME, PollResult.SAME, PollResult.NO_UPDATES,
+        PollResult.SAME, PollResult.SAME, PollResult.ERROR,
+    ]]
+    assert intervals == [10, 20, 40, 40, 50, 50, 10]
+
+
+async def test_sources_spread():
+    client = PublishedMessages()
+    sources = [DummySource(client, .1) for _ in range(4)] + [DummySource(client, 1)]
+    scheduler = SpreadScheduler(sources)
+    assert [round(scheduler.phases[src], 3) for src in sources] == [0, .025, .05, .075, 0]
+    stop_event = asyncio.Event()
+    task = asyncio.ensure_future(scheduler.start(stop_event))
+    await asyncio.sleep(.09)
+    stop_event.set()
+    await asyncio.wait_for(task, 2)
+    first_polls = [src.polled_at[0] for src in sources[:4]]
+    assert all(.015 < later - earlier < .05 for earlier, later in zip(first_polls, first_polls[1:]))
+
+
+def test_jitter_reproducible():
+    first, second = DummySource(PublishedMessages(), 10), DummySource(PublishedMessages(), 10)
+    first.jitter = second.jitter = 3
+    jitters = [first._jitter() for _ in range(5)]  # pylint:disable=protected-access
+    assert jitters == [second._jitter() for _ in range(5)]  # pylint:disable=protected-access
+    assert all(0 <= jitter <= 3 for jitter in jitters)
+    assert len(set(jitters)) > 1
+
+
+def test_failures_backoff():
+    source = DummySource(PublishedMessages(), 10)
+    source.max_retry_interval = 50
+    intervals = [source.next_interval(result) for result in [
+        PollResult.FAILED, PollResult.FAILED, PollResult.NO_UPDATES, PollResult.FAILED, PollResult.FAILED,
+        PollResult.CHANGED, PollResult.FAILED,
+    ]]
+    assert intervals == [10, 20, 10, 40, 50, 10, 10]
+
+
+class HangingSource(DummySource):
+
+    async def get_update(self):
+        await super().get_update()
+        await asyncio.sleep(1)
+
+
+async def test_timeouts_not_spinning():
+    source = HangingSource(PublishedMessages(), .02)
+    source.request_timeout = .01
+    source.max_retry_interval = 1
+    stop_event = asyncio.Event()
+    task = asyncio.ensure_future(source.start(stop_event))
+    await asyncio.sleep(.2)
+    stop_event.set()
+    await asyncio.wait_for(task, 2)
+    assert 2 <= len(source.polled_at) <= 4  # retried at .03, .07, .15
+
+
+async def test_duplicates_detected_by_fingerprint():
+    client = PublishedMessages()
+    source = DummySource(client, 10)
+    source.heartbeat_interval = .05
+    assert await source.poll() is PollResult.CHANGED
+    assert await source.poll() is PollResult.SAME
+    assert len(client.messages) == 1
+    await asyncio.sleep(.06)
+    assert await source.poll() is PollResult.SAME
+    assert [topic for topic, _ in client.messages] == [source.TOPICS.changes, source.TOPICS.info]
+
+
+class QueuedEventsSource(DummySource):
+    event_driven = True
+
+    def __init__(self, client, events):
+        super().__init__(client, 5)
+        self.events = asyncio.Queue()
+        for event in events:
+            self.events.put_nowait(event)
+
+    async def get_update(self):
+        try:
+            name = await asyncio.wait_for(self.events.get(), self.polling_interval)
+        except asyncio.TimeoutError:
+            raise NoUpdates
+        self.polled_at.append(asyncio.get_event_loop().time())
+        return generate_message(self.CONFIG_ID, [generate_status(name, Status.OK)])
+
+
+async def test_queued_events_handled_at_once():
+    client = PublishedMessages()
+    source = QueuedEventsSource(client, ['first', 'second', 'third'])
+    stop_event = asyncio.Event()
+    task = asyncio.ensure_future(source.start(stop_event))
+    await asyncio.sleep(.1)
+    stop_event.set()
+    source.events.put_nowait('last')  # wakes up waiting source
+    await asyncio.wait_for(task, 2)
+    assert len(client.messages) == 4
+    assert source.polled_at[-1] - source.polled_at[0] < .15
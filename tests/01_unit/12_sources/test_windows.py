@@ -0,0 +1,170 @@
+import time
+
+import pytest
+
+from delatore.sources import InfluxSourceDiskStateRead, InfluxSourceLBDOWNFailCount, InfluxSourceLBTiming
+from delatore.sources.influx import InfluxQueryResultsException
+from delatore.sources.influx_client import InfluxResult
+from delatore.sources.windows import ArrayWindowStore, SeriesWindow, WindowedStore
+
+pytestmark = pytest.mark.asyncio
+
+
+def test_series_window():
+    window = SeriesWindow(60)
+    assert window.add(10, 1, 't10')
+    assert window.add(20, 5, 't20')
+    assert window.add(20, 3, 't20')  # same timestamp replaces value
+    assert not window.add(15, 100, 't15')
+    assert window.values() == [1, 3]
+    assert (window.min(), window.mean(), window.last_seen) == (1, 2, 't20')
+    window.trim(75)
+    assert window.values() == [3]
+    window.trim(80)
+    assert not window
+    assert window.last_seen == 't20'
+
+
+@pytest.fixture(params=[WindowedStore, ArrayWindowStore])
+def store_cls(request):
+    if request.param is ArrayWindowStore:
+        pytest.importorskip('numpy')
+    return request.param
+
+
+def test_store_cursor(store_cls):
+    store = store_cls(60)
+    assert store.cursor() is None
+    store.add('a', 10, 1, 't10')
+    store.add('b', 30, 1, 't30')
+    store.add('c', 5, 1, 't5')
+    store.trim(66)
+    assert store.cursor() == 't10'  # `c` has no points in the window
+    assert len(store) == 3
+
+
+def test_store_check(store_cls):
+    store = store_cls(60, size=3)
+    for host in range(40):  # more than initial capacity of array store
+        for seconds in range(100, 105):
+            store.add(host, seconds, host + seconds % 2, seconds)
+    store.add(0, 106, 50, 106)
+    store.add(1, 90, 50, 90)  # already consumed
+    store.add(2, 104, 0, 104)  # replaces last value
+    store.trim(150)
+    assert store.values(0) == [1, 0, 50]
+    assert store.values(2) == [2, 3, 0]
+    assert store.check(150, 45, all_above=10).stale == list(range(1, 40))
+    check = store.check(150, 100, all_above=10, all_at_most=0)
+    assert check.stale == []
+    assert check.tripped == list(range(11, 40))
+    assert store.mean(3) == pytest.approx(10 / 3)
+
+    store.retain({1, 11, 39})
+    assert store.keys() == [1, 11, 39]
+    assert store.values(39) == [39, 40, 39]
+    assert store.check(150, 100, all_above=10).tripped == [11, 39]
+    store.add(40, 140, 100, 140)
+    assert store.check(150, 100, all_above=10).tripped == [11, 39, 40]
+
+
+def _result(tags, *rows):
+    return InfluxResult({'statement_id': 0, 'series': [
+        {'name': 'm', 'tags': dict(zip(tags, key)), 'columns': ['time', 'value'], 'values': values}
+        for key, values in rows
+    ]})
+
+
+async def test_lb_timing_incremental():
+    source = InfluxSourceLBTiming(None)
+    source._params = source._params._replace(epoch='s')
+    source.threshold = 110
+    now = int(time.time())
+    responses = [
+        _result(['server'], (['a'], [[now - 10, 100]]), (['b'], [[now - 200, 90]])),
+        _result(['server'], (['a'], [[now - 10, 100], [now - 5, 120]])),
+    ]
+    queries = []
+
+    async def _query(query):
+        queries.append(query)
+        return responses.pop(0)
+
+    source._query = _query
+    update = await source.get_update()
+    assert 'LAST(elapsed)' in queries[0]
+    assert [(st['name'], st['status']) for st in update['status_list']] == [('b', 'fail')]
+    await source.get_update()
+    assert f'time >= {now - 200}s' in queries[1]  # since the oldest series
+    assert source._host_timings.values('a') == [100, 120]
+    assert source._host_timings.values('b') == [90]
+
+
+async def test_fail_count_first_poll():
+    source = InfluxSourceLBDOWNFailCount(None)
+    source._params = source._params._replace(epoch='s')
+    now = int(time.time()) // 60 * 60
+    minutes = [now - 60 * i for i in range(4, -1, -1)]
+    queries = []
+
+    async def _query(query):
+        queries.append(query)
+        return _result(['host'],
+                       (['failing'], [[minute, 10] for minute in minutes]),
+                       (['recent'], [[minute, 10 if minute == now else 0] for minute in minutes]))
+
+    source._query = _query
+    update = await source.get_update()
+    assert 'now() - 300s' in queries[0]  # whole window is queried
+    assert [(st['name'], st['status']) for st in update['status_list']] == [('failing', 'alerting')]
+
+
+async def test_fail_count_stale_and_broken():
+    source = InfluxSourceLBDOWNFailCount(None)
+    source._params = source._params._replace(epoch='s')
+    now = int(time.time()) // 60 * 60
+    responses = [
+        _result(['host'], (['a'], [[now - 1000, 10]]), (['b'], [[now - 900, 10]])),
+        _result([]),  # no failures since the last poll
+        _result(['name'], (['a'], [[now, 10]])),
+    ]
+
+    async def _query(query):
+        return responses.pop(0)
+
+    source._query = _query
+    update = await source.get_update()
+    metric = source._metrics[0]
+    assert [(st['name'], st['status'], st['timestamp']) for st in update['status_list']] == [
+        (metric.name, 'fail', source._format_time(now - 900)),
+    ]
+    update = await source.get_update()
+    assert [st['name'] for st in update['status_list']] == [metric.name]
+    with pytest.raises(InfluxQueryResultsException):
+        await source.get_update()
+
+
+async def test_disk_state_checked():
+    source = InfluxSourceDiskStateRead(None)
+    source._params = source._params._replace(epoch='s')
+    now = int(time.time())
+    hosts = InfluxSourceDiskStateRead.hosts
+
+    disks = [([hosts[0], 'vdb'], [[now, 5]]),
+             ([hosts[0], 'vdc'], [[now, 0]]),
+             ([hosts[1], 'sda'], [[now - 1000, 7]]),
+             ([hosts[1], 'vda'], [[now, 0]])]
+
+    async def _query(query):
+        if 'diskio' not in query:
+            return _result([])
+        return _result(['host', 'name'], *disks)
+
+    source._query = _query
+    update = await source.get_update()
+    assert [(st['name'], st['status']) for st in update['status_list']] == [
+        (hosts[1], 'fail'), (hosts[0], 'alerting'),
+    ]
+    del disks[2]  # device stopped reporting
+    update = await source.get_update()
+    assert [(st['name'], st['status']) for st in update['status_list']] == [(hosts[0], 'alerting')]
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from delatore.outputs import AlertaRunner
+from delatore.outputs.alerta.api import AlertaApi, AlertaError
+from delatore.unified_json import Status, generate_message, generate_status
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeAlerta:
+
+    def __init__(self):
+        self.alerts = []
+        self.active = self.max_active = 0
+
+    async def post_alert(self, request: web.Request):
+        assert request.headers['Authorization'] == 'Key secret'
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(.05)
+        self.active -= 1
+        alert = await request.json()
+        self.alerts.append(alert)
+        return web.json_response({'status': 'ok', 'id': alert['event'], 'alert': alert})
+
+    async def get_alerts(self, request: web.Request):
+        assert request.query['origin'] == 'delatore'
+        return web.json_response({'status': 'ok', 'alerts': [
+            {'id': 'host-0', 'resource': 'csm_influxdb', 'event': 'host-0', 'severity': 'ok', 'value': ''},
+        ]})
+
+    async def delete_alert(self, request: web.Request):
+        return web.json_response({'status': 'error', 'message': 'not found'}, status=404)
+
+
+@pytest.fixture
+async def alerta_endpoint():
+    fake = FakeAlerta()
+    app = web.Application()
+    app.add_routes([web.post('/alert', fake.post_alert), web.get('/alerts', fake.get_alerts),
+                    web.delete('/alert/{id}', fake.delete_alert)])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield fake, f'http://127.0.0.1:{port}'
+    await runner.cleanup()
+
+
+async def test_records_sent_concurrently(service, stop_event, alerta_endpoint):
+    fake, endpoint = alerta_endpoint
+    runner = AlertaRunner(service, stop_event, send_heartbeats=False)
+    runner._alerta = AlertaApi(endpoint, 'secret', max_concurrency=3)
+    message = generate_message('influxdb', [
+        generate_status(f'host-{index}', Status.FAIL if index % 2 else Status.OK) for index in range(6)
+    ])
+    try:
+        ids = await asyncio.wait_for(runner.alert(message), .25)  # sequential sending takes .3s
+        assert ids == [f'host-{index}' for index in range(6)]
+        assert fake.max_active == 3
+        severities = {alert['event']: alert['severity'] for alert in fake.alerts}
+        assert (severities['host-0'], severities['host-1']) == ('ok', 'minor')
+        with pytest.raises(AlertaError):
+            await runner.remove(['host-0'])
+    finally:
+        await runner.alerta.close()
+
+
+async def test_unchanged_alerts_skipped(service, stop_event, alerta_endpoint):
+    fake, endpoint = alerta_endpoint
+    runner = AlertaRunner(service, stop_event, send_heartbeats=False)
+    runner._alerta = AlertaApi(endpoint, 'secret')
+
+    def _message(status):
+        return generate_message('influxdb', [generate_status('host-0', Status.OK), generate_status('host-1', status)])
+
+    try:
+        await runner._seed_index()
+        assert await runner.alert(_message(Status.OK)) == ['host-0', 'host-1']
+        assert await runner.alert(_message(Status.OK)) == ['host-0', 'host-1']
+        assert [alert['event'] for alert in fake.alerts] == ['host-1']  # host-0 is seeded as ok
+        await runner.alert(_message(Status.FAIL))
+        assert [alert['severity'] for alert in fake.alerts] == ['ok', 'minor']
+    finally:
+        await runner.alerta.close()
@@ -21,7 +21,7 @@ async def test_src_to_bot(patched_bot, bot_alert_queue: Queue, source_data):
 async def test_src_to_alerta(patched_alerta, bot_alert_queue: Queue, source_data_alerta):
     source, (_, message) = source_data_alerta
     message = json.dumps(message)
-    patched_alerta.alert(message)
+    await patched_alerta.alert(message)
     try:
         await asyncio.wait_for(bot_alert_queue.get(), 1.5)
         bot_alert_queue.task_done()
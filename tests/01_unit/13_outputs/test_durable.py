@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from delatore.outputs.durable import DurableOutbox, Undeliverable
+from delatore.serialization import decode
+from delatore.unified_json import Status, generate_message, generate_status
+
+pytestmark = pytest.mark.asyncio
+
+
+class FlakyOutput:
+
+    def __init__(self, failures, unreachable=(), rejected=()):
+        self.failures = failures
+        self.unreachable = set(unreachable)
+        self.rejected = set(rejected)
+        self.delivered = []
+
+    async def deliver(self, data):
+        if data['source'] in self.rejected:
+            raise Undeliverable('message is rejected')
+        if self.failures or data['source'] in self.unreachable:
+            self.failures = max(self.failures - 1, 0)
+            raise ConnectionError('output is unreachable')
+        self.delivered.append(data['source'])
+
+
+async def _deliver_all(outbox: DurableOutbox, output: FlakyOutput, count: int):
+    stopped = asyncio.get_event_loop().create_future()
+    task = asyncio.ensure_future(outbox.deliver(output.deliver, stopped))
+    for _ in range(100):
+        if len(output.delivered) >= count:
+            break
+        await asyncio.sleep(.01)
+    stopped.set_result(True)
+    await asyncio.wait_for(task, 1)
+
+
+async def test_retry_and_replay(tmp_path):
+    path = str(tmp_path / 'outbox.db')
+    outbox = DurableOutbox('alerta', path, retry_interval=.01)
+    message = generate_message('influxdb', [generate_status('TEST', Status.FAIL)])
+    await outbox.append([message, message.to_json(), {'source': 'awx_api', 'status_list': []}])
+    await outbox.append([{'source': 'last', 'status_list': []}])
+    output = FlakyOutput(failures=2, unreachable=['awx_api'])
+    await _deliver_all(outbox, output, 2)
+    assert output.delivered == ['influxdb', 'influxdb']
+    await outbox.close()
+    output.unreachable.clear()
+
+    restarted = DurableOutbox('alerta', path, retry_interval=.01)
+    other_output = DurableOutbox('telegram_bot', path)
+    assert await other_output.pending() == []
+    await _deliver_all(restarted, output, 4)
+    assert output.delivered == ['influxdb', 'influxdb', 'awx_api', 'last']
+    assert await restarted.pending() == []
+    await restarted.close()
+    await other_output.close()
+
+
+async def test_received_not_parsed_again():
+    outbox = DurableOutbox('telegram_bot')
+    message = generate_message('influxdb', [generate_status('TEST', Status.FAIL)])
+    payload = generate_message('awx_api', []).to_json()
+    await outbox.append([message, payload])
+    assert [stored for _, stored in await outbox.pending()] == [message.to_json(), payload]
+    delivered = []
+
+    async def _deliver(data):
+        delivered.append(data)
+
+    stopped = asyncio.get_event_loop().create_future()
+    task = asyncio.ensure_future(outbox.deliver(_deliver, stopped))
+    await asyncio.sleep(.05)
+    stopped.set_result(True)
+    await asyncio.wait_for(task, 1)
+    await outbox.close()
+    assert len(delivered) == 2
+    assert delivered[0] is message
+    assert delivered[1] is decode(payload)
+
+
+async def test_backoff_not_interrupted():
+    outbox = DurableOutbox('alerta', retry_interval=.05)
+    output = FlakyOutput(failures=100)
+    message = generate_message('influxdb', [generate_status('TEST', Status.FAIL)])
+    stopped = asyncio.get_event_loop().create_future()
+    task = asyncio.ensure_future(outbox.deliver(output.deliver, stopped))
+    for _ in range(20):
+        await outbox.append([message])
+        await asyncio.sleep(.005)
+    stopped.set_result(True)
+    await asyncio.wait_for(task, 1)
+    await outbox.close()
+    assert 100 - output.failures <= 4  # retried with backoff, not on every appended message
+
+
+@pytest.mark.parametrize('concurrent', [False, True])
+async def test_rejected_skipped(concurrent):
+    outbox = DurableOutbox('alerta', retry_interval=.01)
+    await outbox.append([{'source': source, 'status_list': []} for source in ['first', 'broken', 'last']])
+    output = FlakyOutput(failures=0, rejected=['broken'])
+    stopped = asyncio.get_event_loop().create_future()
+    task = asyncio.ensure_future(outbox.deliver(output.deliver, stopped, concurrent))
+    await asyncio.sleep(.05)
+    await outbox.append([{'source': 'appended', 'status_list': []}])
+    await asyncio.sleep(.05)
+    stopped.set_result(True)
+    await asyncio.wait_for(task, 1)
+    assert output.delivered == ['first', 'last', 'appended']
+    assert await outbox.pending() == []
+    [(_, payload, error)] = await outbox.dead_letters()
+    assert decode(payload)['source'] == 'broken'
+    assert 'rejected' in error
+    await outbox.close()
+
+
+async def test_attempts_limited():
+    outbox = DurableOutbox('alerta', retry_interval=.001, max_retry_interval=.001, max_attempts=3)
+    await outbox.append([{'source': source, 'status_list': []} for source in ['awx_api', 'last']])
+    output = FlakyOutput(failures=0, unreachable=['awx_api'])
+    await _deliver_all(outbox, output, 1)
+    assert output.delivered == ['last']
+    [(_, payload, error)] = await outbox.dead_letters()
+    assert decode(payload)['source'] == 'awx_api'
+    assert 'ConnectionError' in error
+    await outbox.close()
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from delatore.outputs.durable import Undeliverable
+from delatore.outputs.telegram.outbox import Outbox, TokenBucket
+
+pytestmark = pytest.mark.asyncio
+
+
+class Posts:
+
+    def __init__(self, rejected=None):
+        self.posts = []
+        self.rejected = rejected
+
+    async def send(self, text, silent):
+        if self.rejected is not None and self.rejected in text:
+            raise Undeliverable('post is rejected')
+        self.posts.append((text, silent))
+
+
+async def test_merged_posts_within_limit():
+    posts = Posts()
+    outbox = Outbox(posts.send, TokenBucket(100, 5), merge_window=.01, limit=20)
+    outbox.put('started', silent=True)
+    for text in ['aaaa', 'bbbb', 'cccc', 'dddd\n' * 5]:
+        outbox.put(text)
+    stopped = asyncio.get_event_loop().create_future()
+    task = asyncio.ensure_future(outbox.run(stopped))
+    await asyncio.wait_for(outbox.post('eeee'), 1)
+    stopped.set_result(True)
+    await asyncio.wait_for(task, 1)
+    assert posts.posts == [
+        ('aaaa\n\nbbbb\n\ncccc', False),
+        ('dddd\ndddd\ndddd\ndddd', False),
+        ('dddd\n\n\neeee', False),
+        ('started', True),
+    ]
+
+
+def test_token_bucket():
+    bucket = TokenBucket.per_minute(20, 3)
+    assert bucket.rate == pytest.approx(17 / 60)
+    for _ in range(3):
+        assert bucket.delay() == 0
+        bucket._tokens -= 1
+    assert bucket.delay() == pytest.approx(60 / 17, .01)
+
+
+async def test_burst_coalesced():
+    posts = Posts()
+    outbox = Outbox(posts.send, TokenBucket(100, 1), merge_window=.02)
+    stopped = asyncio.get_event_loop().create_future()
+    task = asyncio.ensure_future(outbox.run(stopped))
+    outbox.put('silent', silent=True)
+    await asyncio.sleep(.01)
+    for index in range(3):
+        outbox.put(f'alert {index}')
+    await asyncio.sleep(.1)
+    stopped.set_result(True)
+    await asyncio.wait_for(task, 1)
+    assert posts.posts == [('alert 0\n\nalert 1\n\nalert 2', False), ('silent', True)]
+
+
+async def test_rejected_part_not_failing_merged():
+    posts = Posts(rejected='broken')
+    outbox = Outbox(posts.send, TokenBucket(100, 5), merge_window=.01)
+    stopped = asyncio.get_event_loop().create_future()
+    task = asyncio.ensure_future(outbox.run(stopped))
+    sent = [asyncio.ensure_future(outbox.post(text)) for text in ['first', 'broken', 'last']]
+    await asyncio.wait(sent, timeout=1)
+    stopped.set_result(True)
+    await asyncio.wait_for(task, 1)
+    assert posts.posts == [('first', False), ('last', False)]
+    assert [post.exception() is None for post in sent] == [True, False, True]
@@ -0,0 +1,90 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.utils.exceptions import MessageToEditNotFound
+
+from delatore.outputs.telegram.board import StatusBoard
+from delatore.outputs.telegram.outbox import Outbox, TokenBucket
+from delatore.unified_json import Status, generate_error_status, generate_message, generate_status
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeBot:
+
+    def __init__(self):
+        self.calls = []
+        self.next_id = 0
+
+    async def edit_message_text(self, text, chat_id, message_id):
+        self.calls.append(('edit', message_id))
+        if message_id == 1:
+            raise MessageToEditNotFound('Message to edit not found')
+
+    async def pin_chat_message(self, chat_id, message_id, disable_notification):
+        self.calls.append(('pin', message_id))
+
+
+@pytest.fixture
+async def runner():
+    bot = FakeBot()
+
+    async def _silent(text):
+        bot.next_id += 1
+        bot.calls.append(('send', bot.next_id))
+        return SimpleNamespace(message_id=bot.next_id)
+
+    runner = SimpleNamespace(bot=bot, chat_id='chat', silent=_silent, notifications=[])
+
+    async def _send(text, silent):
+        runner.notifications.append((text, silent))
+
+    runner.outbox = Outbox(_send, TokenBucket(1000, 10), merge_window=0)
+    stopped = asyncio.get_event_loop().create_future()
+    sending = asyncio.ensure_future(runner.outbox.run(stopped))
+    yield runner
+    stopped.set_result(True)
+    await asyncio.wait_for(sending, 1)
+
+
+def _message(*statuses):
+    return generate_message('influxdb', [
+        generate_status(f'host-{index}', status) for index, status in enumerate(statuses)
+    ])
+
+
+async def test_board_edited(runner, tmp_path):
+    path = str(tmp_path / 'board.json')
+    board = StatusBoard(runner, path)
+    await board.update(_message(Status.OK, Status.OK))
+    await board.update(_message(Status.OK, Status.FAIL))
+    await board.update(_message(Status.FAIL, Status.FAIL))
+    assert runner.bot.calls == [('send', 1), ('pin', 1), ('edit', 1), ('send', 2), ('pin', 2), ('edit', 2)]
+    assert len(runner.notifications) == 2
+    (host_1, silent), (host_0, _) = runner.notifications
+    assert not silent
+    assert 'host\\-1' in host_1 and 'host\\-0' in host_0
+
+    restarted = StatusBoard(runner, path)
+    assert restarted.boards == board.boards
+    await restarted.update(_message(Status.FAIL, Status.FAIL))
+    assert runner.bot.calls[-1] == ('edit', 2)
+    assert len(runner.notifications) == 2
+
+
+async def test_repeated_incident_notified(runner, tmp_path):
+    board = StatusBoard(runner, str(tmp_path / 'board.json'), ttl=.05)
+    await board.update(_message(Status.FAIL, Status.FAIL))
+    await board.update(_message(Status.OK))  # host-1 is not reported anymore
+    await board.update(_message(Status.FAIL, Status.FAIL))
+    assert len(runner.notifications) == 2
+    assert 'host\\-1' in runner.notifications[1][0]
+
+    error_report = generate_message('lb_timing', [generate_error_status('host', 'slow', Status.ALERTING)])
+    await board.update(error_report)
+    await board.update(error_report)
+    assert len(runner.notifications) == 3
+    await asyncio.sleep(.07)  # no reports after recovery
+    await board.update(error_report)
+    assert len(runner.notifications) == 4
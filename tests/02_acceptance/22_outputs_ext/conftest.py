@@ -9,5 +9,7 @@ def bot(service, stop_event):
 
 
 @pytest.fixture
-def alerta(service, stop_event):
-    return AlertaRunner(msg_service=service, stop_event=stop_event, send_heartbeats=False)
+async def alerta(service, stop_event):
+    runner = AlertaRunner(msg_service=service, stop_event=stop_event, send_heartbeats=False)
+    yield runner
+    await runner.alerta.close()
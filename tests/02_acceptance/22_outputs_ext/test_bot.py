@@ -11,12 +11,12 @@ async def send_and_remove_tg(_bot, text):
 
 
 async def send_and_remove_alerta(_alerta, status_list):
-    alerts_id = _alerta.alert(status_list)
-    _alerta.remove(alerts_id)
+    alerts_id = await _alerta.alert(status_list)
+    await _alerta.remove(alerts_id)
 
 
 async def send_alerta(_alerta, status_list):
-    _alerta.alert(status_list)
+    await _alerta.alert(status_list)
 
 
 async def test_send_message_tg(bot):
@@ -42,5 +42,5 @@ async def test_alerta_message_series(alerta, source_data_alerta_series):
 
 @pytest.mark.skip
 async def test_alerta_heartbeat_proc(alerta):
-    heartbeat_id = alerta.process_heartbeat()
-    assert alerta.alerta.get_heartbeat(heartbeat_id)
+    heartbeat_id = await alerta.process_heartbeat()
+    assert await alerta.alerta.get_heartbeat(heartbeat_id)
@@ -10,6 +10,7 @@ import pytest
 
 from delatore.outputs import AlertaRunner, BotRunner
 from delatore.outputs.telegram.json2mdwn import convert
+from delatore.signals import StopSignal
 from delatore.sources import AWXApiSource, AWXWebHookSource, InfluxSource
 from delatore.unified_json import convert_timestamp
 from tests import SERVICE
@@ -24,7 +25,7 @@ def service():
 
 @pytest.fixture
 def stop_event():
-    return asyncio.Event()
+    return StopSignal()
 
 
 @pytest.fixture
@@ -225,7 +226,7 @@ async def patched_bot(service, stop_event, bot_alert_queue: Queue, bot_silent_qu
 async def patched_alerta(service, stop_event, bot_alert_queue: Queue):
     alerta = AlertaRunner(msg_service=service, stop_event=stop_event, send_heartbeats=False)
 
-    def _alert(item):
+    async def _alert(item):
         bot_alert_queue.put_nowait(item)
 
     alerta.alert = _alert